@@ -1,19 +1,24 @@
 #!/usr/bin/python3
 
 """
-Usage: asap-graph file [-aoclmsb] (FILE) [FILE]... [ -p SAVEPATH] 
-       asap-graph cat [-aoclmsb] (FILE) (FILE) [-p SAVEPATH]
-       asap-graph xp [-aoclmsb] [-p SAVEPATH] [-x XPATH]
+Usage: asap-graph file [-aoclmsbd] [--from TIME] [--to TIME] [--full-resolution] [--legacy-parser] [--no-cache | --rebuild-cache] [-j N] (FILE) [FILE]... [ -p SAVEPATH] 
+       asap-graph cat [-aoclmsbd] [--from TIME] [--to TIME] [--full-resolution] [--legacy-parser] [--no-cache | --rebuild-cache] [-j N] (FILE) (FILE) [-p SAVEPATH]
+       asap-graph xp [-aoclmsbd] [--from TIME] [--to TIME] [--full-resolution] [--legacy-parser] [--no-cache | --rebuild-cache] [-j N] [--worker-memory MB] [--max-depth N] [--force] [-p SAVEPATH] [-x XPATH]
+       asap-graph stats [--from TIME] [--to TIME] [--legacy-parser] [--no-cache | --rebuild-cache] [--json] (FILE) [FILE]...
         
     Modes:
           
           file          Provide one sar file to plot. 
           cat           Concatenate sar files together.
-          xp            Extract sar files recursively and plot it.
+          xp            Extract sar files recursively and plot them, one timeline per directory and host.
+          stats         Print min, max, mean, p50, p95, p99 and the time of the peak of every metric,
+                        per day and over all days of a host (no graphs).
     
     Arguments:
           
           FILE          Mandatory sar file / two sar files as range for concatenation.
+                        Files may be .gz, .bz2 or .xz compressed, file mode also takes tar archives.
+                        Binary saNN files (sysstat 11.7 and later) and sadf -j output are read as well.
               
     Options:
           
@@ -25,8 +30,24 @@ Usage: asap-graph file [-aoclmsb] (FILE) [FILE]... [ -p SAVEPATH]
           -m            Memory graphs.
           -s            Miscellaneous graphs.
           -b            Storage (block) graphs.
+          -d            Per-CPU, per-disk and per-interface heatmaps (not part of -a).
           -p SAVEPATH   Provide save path.
           -x XPATH      Optional path when extracting recursively (Default: cwd).
+          --max-depth N Don't look for sar files more than N directories below XPATH.
+          --force       Plot every group again, even when its files and options are the same as last time.
+          --json        Print the stats as JSON instead of tables.
+          -j N          Parallel jobs: directories / hosts in xp mode, parsed files in cat mode, graph groups otherwise [default: 1].
+          --worker-memory MB
+                        Memory limit of every -j worker (Default: RAM / N, at least 1024).
+          --from TIME   Plot from TIME on: "YYYY-MM-DD HH:MM[:SS]", or a span like -2h (before --to or now).
+          --to TIME     Plot up to TIME: "YYYY-MM-DD HH:MM[:SS]", or a span like +90m (after --from or now).
+          --full-resolution
+                        Plot every sample, don't reduce long ranges to the min/max per pixel.
+          --legacy-parser
+                        Use the old line-by-line sar parser (for A/B comparison).
+          --no-cache    Don't use the parse cache (~/.cache/asap-graph).
+          --rebuild-cache
+                        Parse all files again and replace their cached data.
 """
 
 import warnings
@@ -35,13 +56,43 @@ import re
 import os
 import sys
 import shutil
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 import datetime
 import time
-import numpy as np
-import numpy.ma as ma 
-from docopt import docopt
+import calendar
+import hashlib
+import json
+import tempfile
+import io
+import contextlib
+import importlib
+import collections
+import queue
+import threading
+import resource
+import gzip
+import bz2
+import lzma
+import tarfile
+import mmap
+import struct
+import locale
+import subprocess
+
+class LazyModule: # stands in for a module until its first use, --help and argument errors don't pay for importing numpy & co.
+
+    def __init__(self, global_name, module_name):
+        self.global_name = global_name
+        self.module_name = module_name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.module_name)
+        globals()[self.global_name] = module # later lookups find the module itself
+        return getattr(module, attribute)
+
+np = LazyModule("np", "numpy")
+multiprocessing = LazyModule("multiprocessing", "multiprocessing")
+shared_memory = LazyModule("shared_memory", "multiprocessing.shared_memory")
+futures = LazyModule("futures", "concurrent.futures")
 
 
 def list_get(lst, index, default = None): # returns list index (time only)
@@ -50,14 +101,18 @@ def list_get(lst, index, default = None): # returns list index (time only)
         
     return default
                     
-def complete_concat_sars(concat_sars): # complete sarfiles for concatenation
+def complete_concat_sars(concat_sars, window = None): # complete sarfiles for concatenation (days in the TimeWindow only)
     
     try:
-        from_path_prefix = re.search('(.*)(?=sar)', "".join(concat_sars[0])).group(0)
-        to_path_prefix = re.search('(.*)(?=sar)', "".join(concat_sars[1])).group(0)
+        from_path_prefix = re.search('(.*)(?=sar?\d)', "".join(concat_sars[0])).group(0)
+        to_path_prefix = re.search('(.*)(?=sar?\d)', "".join(concat_sars[1])).group(0)
         
-        sar_from = int(re.search('(?<=sar)(\d+)', "".join(concat_sars[0])).group(1))
-        sar_to = int(re.search('(?<=sar)(\d+)', "".join(concat_sars[1])).group(1))
+        sar_from = int(re.search('(?<=sa)r?(\d+)', os.path.basename("".join(concat_sars[0]))).group(1))
+        sar_to = int(re.search('(?<=sa)r?(\d+)', os.path.basename("".join(concat_sars[1]))).group(1))
+
+        # sarNN text or saNN binary files, maybe compressed
+        stem, extension = re.search('(sar?)\d+(\.(?:gz|bz2|xz))?', os.path.basename("".join(concat_sars[0]))).groups()
+        extension = extension or ""
         
         sarfiles_filled = []
         
@@ -65,79 +120,1726 @@ def complete_concat_sars(concat_sars): # complete sarfiles for concatenation
             if sar_from <= sar_to:                
                 for suffix in range(sar_from, sar_to + 1):
                     if len(str(suffix)) == 1:
-                        sarfiles_filled.append(from_path_prefix + "sar0" + str(suffix))
+                        sarfiles_filled.append(from_path_prefix + stem + "0" + str(suffix) + extension)
                     else:
-                        sarfiles_filled.append(from_path_prefix + "sar" + str(suffix))
+                        sarfiles_filled.append(from_path_prefix + stem + str(suffix) + extension)
                 
             else:
                 for suffix in range(sar_from, 32):
                     if len(str(suffix)) == 1:
-                        sarfiles_filled.append(from_path_prefix + "sar0" + str(suffix))
+                        sarfiles_filled.append(from_path_prefix + stem + "0" + str(suffix) + extension)
                     else:
-                        sarfiles_filled.append(from_path_prefix + "sar" + str(suffix))
+                        sarfiles_filled.append(from_path_prefix + stem + str(suffix) + extension)
                 for suffix in range(1, sar_to + 1):
                     if len(str(suffix)) == 1:
-                        sarfiles_filled.append(from_path_prefix + "sar0" + str(suffix))
+                        sarfiles_filled.append(from_path_prefix + stem + "0" + str(suffix) + extension)
                     else:
-                        sarfiles_filled.append(from_path_prefix + "sar" + str(suffix))
+                        sarfiles_filled.append(from_path_prefix + stem + str(suffix) + extension)
     
+            if window is not None:
+                sarfiles_filled = [sarfile for sarfile in sarfiles_filled
+                                   if window.covers_day(int(re.search('(?<=sa)r?(\d+)', os.path.basename(sarfile)).group(1)))]
+
             return sarfiles_filled
     
         else:
             print(Bcolors.FAIL + ("Different paths for concatenation") + Bcolors.ENDC)
             exit(1)
 
-    except AttributeError:
-        print(Bcolors.FAIL + ("Is provided file a valid sar file?") + Bcolors.ENDC)
-        exit(1)
+    except AttributeError:
+        print(Bcolors.FAIL + ("Is provided file a valid sar file?") + Bcolors.ENDC)
+        exit(1)
+
+SAR_FILE = re.compile(r"sar\d{2}(\.(gz|bz2|xz))?$") # plain or compressed sarNN
+SA_FILE = re.compile(r"sa(\d{2})(\.(gz|bz2|xz))?$") # binary saNN, only used when there is no sarNN of the day
+TAR_FILE = re.compile(r".*\.(tar|tar\.gz|tgz|tar\.bz2|tbz2|tar\.xz|txz)$")
+TAR_MEMBER = re.compile(r"(.*?\.(?:tar|tar\.gz|tgz|tar\.bz2|tbz2|tar\.xz|txz))/") # archive part of a member path like sos.tar.xz/var/log/sa/sar15
+
+def open_sar(sarfile, mode = "rt"): # text (or with mode "rb" binary) stream of a plain, gzip, bzip2 or xz compressed sar file
+
+    for extension, module in ((".gz", gzip), (".bz2", bz2), (".xz", lzma)):
+        if sarfile.endswith(extension):
+            return module.open(sarfile, mode)
+
+    return open(sarfile, "r" if mode == "rt" else mode)
+
+MMAP_MIN_SIZE = 64 * 1024 * 1024 # plain sar files from this size on are read through mmap_lines
+MMAP_CHUNK = 1024 * 1024 # captured blocks are decoded this many bytes (whole lines) at a time
+
+def mmap_lines(mm, tokens): # lines of a mapped sar file: the first one and the blocks (lines between blank lines) starting with one of tokens
+
+    encoding = locale.getpreferredencoding(False) # as open() in text mode
+
+    eol = mm.find(b"\n")
+    start = len(mm) if eol < 0 else eol + 1
+    yield mm[:start].decode(encoding)
+
+    while start < len(mm):
+        if mm[start] == 10: # more blank lines
+            start += 1
+            continue
+
+        end = mm.find(b"\n\n", start)
+        if end < 0:
+            end = len(mm)
+
+        # blocks of sections nothing is captured from (network, disks, ...) are never decoded
+        eol = mm.find(b"\n", start, end)
+        first = mm[start:end if eol < 0 else eol]
+        if any(token in first for token in tokens):
+            while start < end:
+                chunk = min(end, start + MMAP_CHUNK)
+                if chunk < end:
+                    chunk = mm.rfind(b"\n", start, chunk) + 1 or end # no line break at all, a single huge line
+                yield from mm[start:chunk].decode(encoding).split("\n")
+                start = chunk
+
+        start = end + 2
+
+@contextlib.contextmanager
+def sar_lines(sarfile, stream = None, tokens = None): # iterable of the lines of a sar file, large plain files are mapped instead of read
+
+    if stream is not None:
+        yield stream
+
+    elif not sarfile.endswith((".gz", ".bz2", ".xz")) and os.path.getsize(sarfile) >= MMAP_MIN_SIZE:
+        with open(sarfile, "rb") as data, mmap.mmap(data.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL) # pages behind the scan can go
+            yield mmap_lines(mm, tokens or HEADER_TOKENS_BYTES)
+
+    else:
+        with open_sar(sarfile) as data:
+            yield data
+
+class MemberReader(io.RawIOBase): # raw stream of a tar member read in stream mode, which TextIOWrapper can't take (no seekable())
+
+    def __init__(self, member):
+        self.member = member
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.member.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def archive_member(sarfile): # (archive, sarfile) for the path of a tar member, (sarfile, None) for anything else
+
+    match = TAR_MEMBER.match(sarfile)
+    if match and os.path.isfile(match.group(1)):
+        return match.group(1), sarfile
+
+    return sarfile, None
+
+def sar_sources(sarfile, members = None): # (name, text stream or None) of every sar file in sarfile (or of the member paths in members), tar members in one sequential pass
+
+    if not TAR_FILE.match(sarfile):
+        yield sarfile, None
+        return
+
+    try:
+        with tarfile.open(sarfile, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and SAR_FILE.match(os.path.basename(member.name)) and (members is None or os.path.join(sarfile, member.name) in members):
+                    with io.TextIOWrapper(io.BufferedReader(MemberReader(archive.extractfile(member)), 1 << 16)) as stream:
+                        yield os.path.join(sarfile, member.name), stream
+
+    except (tarfile.TarError, OSError, EOFError, lzma.LZMAError):
+        print(Bcolors.FAIL + ("FAIL: Can't read archive %s!" % sarfile) + Bcolors.ENDC)
+
+class Bcolors: # just class for colors
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+
+AM_PM = frozenset(["AM", "PM"])
+
+# "Average" labels of the locales sar output is known to come in (end of a section)
+AVERAGE_LABELS = frozenset(['Average:', 'Среднее:', 'Media:', 'Média:', 'Moyenne:', 'Durchschn.:'])
+
+# Section dispatch table, checked in order on header rows only:
+# (tokens which all have to be in the row, RHEL versions (None = any), state, update indeces)
+SECTION_HEADERS = (
+    (("%usr",), None, "cpu_capturing", True),
+    (("%user",), None, "cpu_capturing", True),
+    (("cswch/s",), (5,), "cswch_capturing", True),
+    (("proc/s",), (5,), "procs_capturing", True),
+    (("cswch/s", "proc/s"), None, "procs_cswch_capturing", True),
+    (("pswpin/s",), None, "pswp_capturing", True),
+    (("ldavg-15",), None, "load_capturing", True),
+    (("kbmemfree",), None, "mem_capturing", True),
+    (("kbswpfree",), (6, 7, 8), "swp_capturing", True),
+    (("kbswpfree",), (5,), "swp_rhel5_capturing", False),
+    (("dentunusd",), None, "dent_capturing", True),
+    (("tcpsck",), None, "sck_capturing", True),
+    (("bread/s",), None, "blocks_capturing", True),
+    (("DEV", "tps"), None, "dev_capturing", False),
+    (("IFACE", "rxpck/s"), None, "iface_capturing", False),
+    (("LINUX", "RESTART"), None, "restart", False),
+)
+
+# any row without one of these tokens can't be a header we care about
+HEADER_TOKENS = frozenset(token for tokens, _, _, _ in SECTION_HEADERS for token in tokens)
+HEADER_TOKENS_BYTES = tuple(token.encode() for token in HEADER_TOKENS)
+
+# sections every capturing state feeds, a section is only fed when the header has all its columns
+# (RHEL5 has no separate swap table, kbswpfree comes with the memory one)
+SECTION_TARGETS = {
+    "cpu_capturing": ("cpu_captured", "cpu_entities"),
+    "cswch_capturing": ("cswch_captured",),
+    "procs_capturing": ("procs_captured",),
+    "procs_cswch_capturing": ("procs_captured", "cswch_captured"),
+    "pswp_capturing": ("pswp_captured",),
+    "load_capturing": ("load_captured",),
+    "mem_capturing": ("mem_captured", "swp_captured"),
+    "swp_capturing": ("swp_captured",),
+    "swp_rhel5_capturing": (),
+    "dent_capturing": ("misc_captured",),
+    "sck_capturing": ("sck_captured",),
+    "blocks_capturing": ("blocks_captured",),
+    "dev_capturing": ("disk_entities",),
+    "iface_capturing": ("nic_entities",),
+}
+
+# states whose rows start with the entity (CPU number, device, interface) they are about
+ENTITY_STATES = frozenset(["cpu_capturing", "dev_capturing", "iface_capturing"])
+
+# metric columns kept for every section
+SECTION_COLUMNS = {
+    "cpu_captured": ("%usr", "%nice", "%sys", "%iowait", "%idle"),
+    "procs_captured": ("proc/s",),
+    "cswch_captured": ("cswch/s",),
+    "load_captured": ("runq-sz", "plist-sz", "ldavg-1", "ldavg-5", "ldavg-15"),
+    "mem_captured": ("kbmemfree", "kbmemused", "kbcached"),
+    "swp_captured": ("kbswpfree",),
+    "pswp_captured": ("pswpin/s", "pswpout/s"),
+    "misc_captured": ("dentunusd", "file-nr", "inode-nr"),
+    "sck_captured": ("tcpsck", "udpsck"),
+    "blocks_captured": ("bread/s", "bwrtn/s"),
+}
+
+# metric columns kept for every entity of the per-CPU / per-device sections, only captured when their graphs are asked for
+ENTITY_COLUMNS = {
+    "cpu_entities": ("%usr", "%sys", "%iowait"),
+    "disk_entities": ("tps", "await", "%util"),
+    "nic_entities": ("rxkB/s", "txkB/s"),
+}
+
+# RHEL5 titles of the columns above
+TITLE_ALIASES = {'%user': '%usr', '%system': '%sys', 'file-sz': 'file-nr', 'inode-sz': 'inode-nr'}
+
+def normalize_am_pm(row): # converts "hh:mm:ss AM/PM" at the start of a split row to 24h in place
+
+    am_pm = list_get(row, 1)
+    if am_pm in ("PM", "AM"):
+        t_split = row[0].split(":",1)
+        h = t_split[0]
+        if am_pm == "PM" and t_split[0] != "12":
+            h = (int(t_split[0])+12)
+        if am_pm == "AM" and t_split[0] == "12":
+            h = "00"
+        row[0] = "%s:%s" % (h, t_split[1])
+        del(row[1])
+
+    return row
+
+def clock_seconds(clock): # "hh:mm:ss" (optionally followed by AM/PM) to seconds since midnight
+
+    am_pm = clock[-2:]
+    if am_pm in ("AM", "PM"):
+        clock = clock[:-2]
+
+    h, m, sec = clock.split(":")
+    h = int(h)
+    if am_pm == "PM" and h != 12:
+        h += 12
+    if am_pm == "AM" and h == 12:
+        h = 0
+
+    return h * 3600 + int(m) * 60 + int(sec)
+
+def parse_clocks(clocks): # sequence of distinct "hh:mm:ss[AM|PM]" clocks to seconds since midnight, in bulk
+
+    clocks = np.array(clocks, dtype = "U10").reshape(-1)
+    if not len(clocks):
+        return np.zeros(0, dtype = np.int64)
+
+    codes = clocks.view(np.uint32).reshape(len(clocks), 10).astype(np.int64)
+    digits = codes - ord("0")
+
+    seconds = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 3] * 10 + digits[:, 4]) * 60 + digits[:, 6] * 10 + digits[:, 7]
+
+    # AM/PM: 12 AM is midnight, 12 PM noon
+    pm = codes[:, 8] == ord("P")
+    am_pm = pm | (codes[:, 8] == ord("A"))
+    hours = seconds // 3600
+    seconds += np.where(am_pm, (hours % 12 + 12 * pm - hours) * 3600, 0)
+
+    # anything not shaped "hh:mm:ss" goes the slow way
+    irregular = (codes[:, 2] != ord(":")) | (codes[:, 5] != ord(":")) | (np.char.str_len(clocks) - 2 * am_pm != 8)
+    for num in np.flatnonzero(irregular):
+        seconds[num] = clock_seconds(str(clocks[num]))
+
+    return seconds
+
+def unroll_midnight(seconds): # adds a day after every wrap past midnight (a drop of more than 12 hours)
+
+    wraps = np.cumsum(np.diff(seconds, prepend = seconds[:1]) < -43200)
+
+    return seconds + 86400 * wraps
+
+def normalize_graphdate(date): # "yy-mm-dd" of the dates sar ("mm/dd/yy", "mm/dd/yyyy", "yyyy-mm-dd"), sadf -j and saNN headers come with
+
+    graphdateparts = re.search(r"(\d+)([-/])(\d+)[-/](\d+)", date).groups()
+
+    # year(four digits)-month-day
+    if graphdateparts[1] == "-":
+        return "%s-%s-%s" % (graphdateparts[0][-2:], graphdateparts[2], graphdateparts[3])
+    # month-day-year(two digits)
+    elif graphdateparts[1] == "/" and len(graphdateparts[3]) == 2:
+        return "%s-%s-%s" % (graphdateparts[3], graphdateparts[0], graphdateparts[2])
+    # month-day-year(four digits)
+    elif graphdateparts[1] == "/" and len(graphdateparts[3]) == 4:
+        return "%s-%s-%s" % (graphdateparts[3][-2:], graphdateparts[0], graphdateparts[2])
+
+    raise LookupError("Unknown graph date format: %s" % str(graphdateparts))
+
+def day_start(graphdate): # normalized graphdate to epoch of its midnight (naive, UTC based)
+
+    return calendar.timegm(datetime.datetime.strptime(graphdate, "%y-%m-%d").timetuple())
+
+class SectionBuffer: # growable columnar storage of one sar section: int64 epoch timestamps + one array per metric
+
+    def __init__(self, columns, capacity = 1024, dtype = "float64"):
+        self.columns = tuple(columns)
+        self.position = {column: num for num, column in enumerate(self.columns)}
+        self.size = 0
+        self.times = np.empty(capacity, dtype = np.int64)
+        self.values = np.empty((len(self.columns), capacity), dtype = dtype) # metric major, columns are contiguous
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, column): # array view of one metric
+        return self.values[self.position[column], :self.size]
+
+    def time(self):
+        return self.times[:self.size]
+
+    def datetimes(self): # datetime64 view of the timestamps
+        return self.time().view("datetime64[s]")
+
+    def resolve_clocks(self, seconds, midnight): # replaces clock ids collected while parsing by epoch timestamps
+        times = self.time()
+        times[:] = midnight + unroll_midnight(seconds[times])
+
+    def append(self, timestamp, values):
+
+        if self.size == len(self.times):
+            self.resize(max(2 * self.size, 1024))
+
+        self.times[self.size] = timestamp
+        self.values[:, self.size] = values
+        self.size += 1
+
+    def resize(self, capacity):
+
+        times = np.empty(capacity, dtype = self.times.dtype)
+        values = np.empty((len(self.columns), capacity), dtype = self.values.dtype)
+        times[:self.size] = self.times[:self.size]
+        values[:, :self.size] = self.values[:, :self.size]
+        self.times = times
+        self.values = values
+
+    def trim(self): # drops the unused capacity once the section is complete
+        self.resize(max(self.size, 1))
+
+    @classmethod
+    def from_arrays(cls, columns, times, values): # section around already complete arrays (parse cache)
+
+        section = cls(columns, capacity = 0)
+        section.times = times
+        section.values = values
+        section.size = len(times)
+
+        return section
+
+    def select(self, keep): # new section of the rows where keep is True
+        return SectionBuffer.from_arrays(self.columns, self.time()[keep], self.values[:, :self.size][:, keep])
+
+class EntityBuffer: # growable dense storage of a per-CPU / per-device sar section: (metric, time, entity) float32, NaN where an entity has no row
+
+    def __init__(self, columns, capacity = 1024, dtype = "float32"):
+        self.columns = tuple(columns)
+        self.position = {column: num for num, column in enumerate(self.columns)}
+        self.entities = [] # names in order of appearance, every one stored once
+        self.index = {} # name: entity position
+        self.size = 0
+        self.times = np.empty(capacity, dtype = np.int64)
+        self.values = np.full((len(self.columns), capacity, 4), np.nan, dtype = dtype)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, column): # (time, entity) array view of one metric
+        return self.values[self.position[column], :self.size, :len(self.entities)]
+
+    def time(self):
+        return self.times[:self.size]
+
+    def datetimes(self): # datetime64 view of the timestamps
+        return self.time().view("datetime64[s]")
+
+    def resolve_clocks(self, seconds, midnight): # replaces clock ids collected while parsing by epoch timestamps
+        times = self.time()
+        times[:] = midnight + unroll_midnight(seconds[times])
+
+    def append(self, timestamp, entity, values): # rows of one timestamp come one entity after the other
+
+        if not self.size or self.times[self.size - 1] != timestamp:
+            if self.size == len(self.times):
+                self.resize(max(2 * self.size, 1024), self.values.shape[2])
+            self.times[self.size] = timestamp
+            self.size += 1
+
+        position = self.index.get(entity)
+        if position is None:
+            position = len(self.entities)
+            if position == self.values.shape[2]:
+                self.resize(len(self.times), 2 * position)
+            self.index[entity] = position
+            self.entities.append(entity)
+
+        self.values[:, self.size - 1, position] = values
+
+    def resize(self, capacity, entities):
+
+        times = np.empty(capacity, dtype = self.times.dtype)
+        values = np.full((len(self.columns), capacity, entities), np.nan, dtype = self.values.dtype)
+        times[:self.size] = self.times[:self.size]
+        values[:, :self.size, :len(self.entities)] = self.values[:, :self.size, :len(self.entities)]
+        self.times = times
+        self.values = values
+
+    def trim(self): # drops the unused capacity once the section is complete
+        self.resize(max(self.size, 1), max(len(self.entities), 1))
+
+    @classmethod
+    def from_arrays(cls, columns, entities, times, values): # section around already complete arrays (parse cache)
+
+        section = cls(columns, capacity = 0)
+        section.entities = list(entities)
+        section.index = dict((entity, num) for num, entity in enumerate(section.entities))
+        section.times = times
+        section.values = values
+        section.size = len(times)
+
+        return section
+
+    def select(self, keep): # new section of the rows where keep is True
+        return EntityBuffer.from_arrays(self.columns, self.entities, self.time()[keep], self.values[:, :self.size][:, keep])
+
+def new_section(name, columns): # empty buffer of a section of SECTION_COLUMNS or ENTITY_COLUMNS
+    return EntityBuffer(columns) if name in ENTITY_COLUMNS else SectionBuffer(columns)
+
+SYSSTAT_MAGIC = 0xd596
+SA_FORMATS = {0x2173: 11, 0x2175: 12} # format magic: sysstat major, the self-describing formats (sysstat 11.7 on, RHEL8 and later)
+SA_HEADER_UINTS = 11 # unsigned ints of the file header read below: cpu_nr, act_nr, year, act_types, rec_types, act_size, rec_size
+SA_COMMENT_SIZE = 64
+SA_MAX_FIELDS = 17 # fields of the widest activity SA_COLUMNS reads
+
+R_STATS, R_RESTART, R_LAST_STATS, R_COMMENT = 1, 2, 3, 4 # record types
+
+A_CPU, A_PCSW, A_SWAP, A_IO, A_MEMORY, A_KTABLES, A_QUEUE, A_NET_SOCK = 1, 2, 4, 6, 7, 8, 9, 16 # activity ids
+
+def cpu_share(deltas, field): # % of all CPU time (user ... softirq, guest is part of user) one stats_cpu field took
+
+    total = deltas[:, :8].sum(axis = 1)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        return np.where(total > 0, 100 * deltas[:, field] / total, 0)
+
+# column: (activity, values from item 0 of it as sar computes them: fields and deltas of the record, interval in s, sysstat major)
+SA_COLUMNS = {
+    "%usr": (A_CPU, lambda f, d, itv, v: cpu_share(d, 0) - cpu_share(d, 8)),
+    "%nice": (A_CPU, lambda f, d, itv, v: cpu_share(d, 1) - cpu_share(d, 9)),
+    "%sys": (A_CPU, lambda f, d, itv, v: cpu_share(d, 2)),
+    "%iowait": (A_CPU, lambda f, d, itv, v: cpu_share(d, 4)),
+    "%idle": (A_CPU, lambda f, d, itv, v: cpu_share(d, 3)),
+    "cswch/s": (A_PCSW, lambda f, d, itv, v: d[:, 0] / itv),
+    "proc/s": (A_PCSW, lambda f, d, itv, v: d[:, 1] / itv),
+    "runq-sz": (A_QUEUE, lambda f, d, itv, v: f[:, 0]),
+    "plist-sz": (A_QUEUE, lambda f, d, itv, v: f[:, 5]),
+    "ldavg-1": (A_QUEUE, lambda f, d, itv, v: f[:, 2] / 100),
+    "ldavg-5": (A_QUEUE, lambda f, d, itv, v: f[:, 3] / 100),
+    "ldavg-15": (A_QUEUE, lambda f, d, itv, v: f[:, 4] / 100),
+    "kbmemfree": (A_MEMORY, lambda f, d, itv, v: f[:, 0]),
+    # sysstat 12 leaves buffers, cache and slab out of the used memory
+    "kbmemused": (A_MEMORY, lambda f, d, itv, v: f[:, 3] - f[:, 0] - (f[:, 1] + f[:, 2] + f[:, 12] if v >= 12 else 0)),
+    "kbcached": (A_MEMORY, lambda f, d, itv, v: f[:, 2]),
+    "kbswpfree": (A_MEMORY, lambda f, d, itv, v: f[:, 4]),
+    "pswpin/s": (A_SWAP, lambda f, d, itv, v: d[:, 0] / itv),
+    "pswpout/s": (A_SWAP, lambda f, d, itv, v: d[:, 1] / itv),
+    "dentunusd": (A_KTABLES, lambda f, d, itv, v: f[:, 2]),
+    "file-nr": (A_KTABLES, lambda f, d, itv, v: f[:, 0]),
+    "inode-nr": (A_KTABLES, lambda f, d, itv, v: f[:, 1]),
+    "tcpsck": (A_NET_SOCK, lambda f, d, itv, v: f[:, 1]),
+    "udpsck": (A_NET_SOCK, lambda f, d, itv, v: f[:, 3]),
+    "bread/s": (A_IO, lambda f, d, itv, v: d[:, 3] / itv),
+    "bwrtn/s": (A_IO, lambda f, d, itv, v: d[:, 4] / itv),
+}
+
+def sar_format(sarfile): # "binary" (saNN), "json" (sadf -j) or "text" (sar), by the start of the file
+
+    try:
+        with open_sar(sarfile, "rb") as data:
+            start = data.read(64)
+    except (OSError, EOFError, lzma.LZMAError): # reported by the text parser
+        return "text"
+
+    if len(start) >= 2 and SYSSTAT_MAGIC in (struct.unpack("<H", start[:2])[0], struct.unpack(">H", start[:2])[0]):
+        return "binary"
+    if start.lstrip().startswith(b"{"):
+        return "json"
+
+    return "text"
+
+def sa_data(sarfile): # bytes of a binary saNN file in a format SaFile decodes, older formats converted by sadf -c where it's installed
+
+    with open_sar(sarfile, "rb") as data:
+        raw = data.read()
+
+    order = "<" if struct.unpack_from("<H", raw)[0] == SYSSTAT_MAGIC else ">"
+    if struct.unpack_from(order + "H", raw, 2)[0] in SA_FORMATS or shutil.which("sadf") is None:
+        return raw
+
+    # sadf -c converts files of sysstat 9.1.6 and later (RHEL7), it takes a plain file and writes to stdout
+    with tempfile.NamedTemporaryFile(suffix = ".sa") as source:
+        source.write(raw)
+        source.flush()
+        converted = subprocess.run(["sadf", "-c", source.name], stdout = subprocess.PIPE, stderr = subprocess.DEVNULL)
+
+    return converted.stdout if converted.returncode == 0 and converted.stdout else raw # SaFile reports what sadf couldn't convert
+
+class SaFile: # header and records of a binary sysstat activity file (saNN), raises ValueError for what it can't decode
+
+    def __init__(self, data):
+
+        self.data = data
+        self.order = "<" if struct.unpack_from("<H", data)[0] == SYSSTAT_MAGIC else ">"
+
+        # file_magic
+        magic = self.unpack("HH4BI4I48x", 0)
+        self.format = magic[1]
+        if self.format not in SA_FORMATS:
+            raise ValueError("unsupported sysstat file format 0x%04x, RHEL7 files are read when sadf (sysstat 11.1 or later) is installed, "
+                             "RHEL5/6 ones only through the sarNN file sa2 writes next to them" % self.format)
+        self.version = SA_FORMATS[self.format]
+        # header_size, then upgraded and hdr_types_nr in either order: (long long, long, unsigned int) counts of the file
+        # header, which starts with one long long and one long, and has at least SA_HEADER_UINTS unsigned ints
+        header_size = magic[6]
+        header_types = magic[7:10] if magic[9] >= SA_HEADER_UINTS else magic[8:11]
+        if header_types[2] < SA_HEADER_UINTS or 8 * (header_types[0] + header_types[1]) + 4 * header_types[2] > header_size:
+            raise ValueError("inconsistent file header description")
+        offset = struct.calcsize(self.order + "HH4BI4I48x")
+
+        # file_header: unsigned long long, unsigned long and unsigned int fields, then day, month, sizeof(long) and utsname
+        header = self.unpack(self.fields(header_types) + "BBb65s65s65s65s", offset)
+        ulls = header[:header_types[0] + header_types[1]]
+        uints = header[len(ulls):len(ulls) + header_types[2]]
+        day, month, sizeof_long, sysname, nodename, release, machine = header[len(ulls) + header_types[2]:]
+        if sizeof_long != 8:
+            raise ValueError("files of 32 bit hosts aren't supported")
+
+        self.hz = ulls[1]
+        self.cpu_nr, act_nr, year = uints[:3]
+        self.act_types, self.rec_types = uints[3:6], uints[6:9]
+        act_size, self.rec_size = uints[9:11]
+        extra_next = uints[11] if len(uints) > 11 else 0
+        self.graphdate = "%02d-%02d-%02d" % ((year + 1900) % 100, month + 1, day)
+        self.nodename = nodename.split(b"\0", 1)[0].decode(errors = "replace")
+
+        offset += header_size
+        if extra_next:
+            offset = self.skip_extra(offset)
+
+        # file_activity: id, magic, nr, nr2, (has_nr, sysstat 12), size, types
+        self.activities = []
+        for num in range(act_nr):
+            fields = self.unpack(self.fields(self.act_types), offset + num * act_size)
+            has_nr = fields[4] if len(fields) > 8 else False
+            self.activities.append({"id": fields[0], "nr": fields[2], "nr2": fields[3], "has_nr": has_nr,
+                                    "size": fields[-4], "types": fields[-3:]})
+        self.records_offset = offset + act_nr * act_size
+
+    def unpack(self, fields, offset):
+        return struct.unpack_from(self.order + fields, self.data, offset)
+
+    def fields(self, types): # struct format of (unsigned long long, unsigned long, unsigned int) counts, 64 bit longs
+        return "Q" * (types[0] + types[1]) + "I" * types[2]
+
+    def skip_extra(self, offset): # offset after the chain of extra structures (sysstat 12) starting at offset
+
+        extra_next = True
+        while extra_next:
+            extra_nr, extra_size, extra_next = self.unpack("3I12x", offset)
+            offset += 24 + extra_nr * extra_size
+
+        return offset
+
+    def records(self, activities): # (record types, clocks, uptimes in s, {activity: item 0 fields of every stats record})
+
+        kinds, clocks, uptimes = [], [], []
+        items = dict((activity, []) for activity in activities)
+
+        header = struct.Struct(self.order + self.fields(self.rec_types) + "4B")
+        decoders = [(activity, struct.Struct(self.order + self.fields(activity["types"])) if activity["id"] in activities else None)
+                    for activity in self.activities]
+        count = struct.Struct(self.order + "i")
+        new_cpu_nr = struct.Struct(self.order + "I")
+        data = self.data
+        offset = self.records_offset
+
+        while offset + self.rec_size <= len(data):
+            record = header.unpack_from(data, offset)
+            offset += self.rec_size
+            kind, hour, minute, second = record[-4:]
+
+            if self.version >= 12:
+                uptime = record[0] / 100 # uptime_cs
+                if record[2]:
+                    offset = self.skip_extra(offset)
+            else:
+                uptime = (record[1] or record[0]) / self.hz # uptime0 (proc 0) when set, uptime otherwise
+
+            if kind == R_COMMENT:
+                offset += SA_COMMENT_SIZE
+                continue
+
+            if kind == R_RESTART:
+                if offset + 4 > len(data):
+                    break
+                cpu_nr, = new_cpu_nr.unpack_from(data, offset)
+                offset += 4
+                for activity, decoder in decoders:
+                    if activity["id"] == A_CPU and not activity["has_nr"]:
+                        activity["nr"] = cpu_nr
+
+            elif kind in (R_STATS, R_LAST_STATS):
+                values = {}
+                for activity, decoder in decoders:
+                    nr = activity["nr"]
+                    if activity["has_nr"]:
+                        nr, = count.unpack_from(data, offset)
+                        offset += 4
+                    if decoder is not None:
+                        values[activity["id"]] = decoder.unpack_from(data, offset) if nr > 0 else None
+                    offset += nr * activity["nr2"] * activity["size"]
+                if offset > len(data): # sadc still writing it
+                    break
+                for activity in items:
+                    items[activity].append(values.get(activity))
+
+            else:
+                raise ValueError("unknown record type %d" % kind)
+
+            kinds.append(kind)
+            clocks.append(hour * 3600 + minute * 60 + second)
+            uptimes.append(uptime)
+
+        return np.array(kinds, dtype = np.int8), np.array(clocks, dtype = np.int64), np.array(uptimes), items
+
+    def sections(self, sections, midnight): # {section: SectionBuffer} of the given {section: columns}, restarts
+
+        activities = set(SA_COLUMNS[column][0] for columns in sections.values() for column in columns)
+        kinds, clocks, uptimes, items = self.records(activities)
+
+        seconds = midnight + unroll_midnight(clocks) # clocks of the host, as sar -t prints them
+        restarts = seconds[kinds == R_RESTART]
+
+        # like sar, every stats record is compared to the previous one of the same boot
+        stats = np.flatnonzero(kinds != R_RESTART)
+        boot = np.cumsum(kinds == R_RESTART)[stats]
+        follows = boot[1:] == boot[:-1]
+        times = seconds[stats[1:]]
+        interval = uptimes[stats[1:]] - uptimes[stats[:-1]]
+
+        # activities the file lacks read as NaN, with the fields of the widest one (stats_memory)
+        widths = dict((activity["id"], sum(activity["types"])) for activity in self.activities)
+        fields = {}
+        for activity, values in items.items():
+            width = widths.get(activity, SA_MAX_FIELDS)
+            array = np.array([value if value is not None else (np.nan,) * width for value in values], dtype = np.float64).reshape(len(values), width)
+            fields[activity] = (array[1:], array[1:] - array[:-1])
+
+        data_struct = {}
+        for name, columns in sections.items():
+            with np.errstate(divide = "ignore", invalid = "ignore"):
+                values = np.array([SA_COLUMNS[column][1](*fields[SA_COLUMNS[column][0]], interval, self.version) for column in columns]).reshape(len(columns), len(times))
+            keep = follows & (interval > 0) & ~np.isnan(values).any(axis = 0)
+            data_struct[name] = SectionBuffer.from_arrays(columns, times[keep], np.ascontiguousarray(values[:, keep]))
+
+        data_struct["restarts"] = restarts
+
+        return data_struct
+
+UTC_ZONES = frozenset(["UTC", "GMT", "UCT"]) # sadf -j "timezone" of hosts whose local time is UTC
+
+# column: key paths of its value in a sadf -j statistics record, the first one found is used (sysstat 11.7 / 12 names)
+SADF_COLUMNS = {
+    "%usr": (("cpu-load-all", "usr"), ("cpu-load", "user")),
+    "%nice": (("cpu-load-all", "nice"), ("cpu-load", "nice")),
+    "%sys": (("cpu-load-all", "sys"), ("cpu-load", "system")),
+    "%iowait": (("cpu-load-all", "iowait"), ("cpu-load", "iowait")),
+    "%idle": (("cpu-load-all", "idle"), ("cpu-load", "idle")),
+    "cswch/s": (("process-and-context-switch", "cswch"),),
+    "proc/s": (("process-and-context-switch", "proc"),),
+    "runq-sz": (("queue", "runq-sz"),),
+    "plist-sz": (("queue", "plist-sz"),),
+    "ldavg-1": (("queue", "ldavg-1"),),
+    "ldavg-5": (("queue", "ldavg-5"),),
+    "ldavg-15": (("queue", "ldavg-15"),),
+    "kbmemfree": (("memory", "memfree"),),
+    "kbmemused": (("memory", "memused"),),
+    "kbcached": (("memory", "cached"),),
+    "kbswpfree": (("memory", "swpfree"),),
+    "pswpin/s": (("swap-pages", "pswpin"),),
+    "pswpout/s": (("swap-pages", "pswpout"),),
+    "dentunusd": (("kernel", "dentunusd"),),
+    "file-nr": (("kernel", "file-nr"),),
+    "inode-nr": (("kernel", "inode-nr"),),
+    "tcpsck": (("network", "net-sock", "tcpsck"),),
+    "udpsck": (("network", "net-sock", "udpsck"),),
+    "bread/s": (("io", "io-reads", "bread"),),
+    "bwrtn/s": (("io", "io-writes", "bwrtn"),),
+}
+
+# entity section: (key paths of the per entity list, entity name key, {column: keys of its value})
+SADF_ENTITIES = {
+    "cpu_entities": ((("cpu-load-all",), ("cpu-load",)), "cpu", {"%usr": ("usr", "user"), "%sys": ("sys", "system"), "%iowait": ("iowait",)}),
+    "disk_entities": ((("disk",),), "disk-device", {"tps": ("tps",), "await": ("await",), "%util": ("util-percent",)}),
+    "nic_entities": ((("network", "net-dev"),), "iface", {"rxkB/s": ("rxkB",), "txkB/s": ("txkB",)}),
+}
+
+def sadf_entities(record, section, columns): # (name, values) of every entity but "all" of a statistics record
+
+    paths, name_key, keys = SADF_ENTITIES[section]
+    for path in paths:
+        items = record
+        for key in path:
+            items = items.get(key) if isinstance(items, dict) else None
+        if isinstance(items, list):
+            break
+    else:
+        return
+
+    for item in items:
+        name = str(item.get(name_key))
+        if name != "all":
+            values = [next((float(item[key]) for key in keys[column] if key in item), None) for column in columns]
+            if None not in values:
+                yield name, values
+
+def sadf_value(record, paths): # float at the first of paths found in a statistics record, None if none is there
+
+    for path in paths:
+        value = record
+        for key in path:
+            if isinstance(value, list): # per CPU / device lists start with "all"
+                value = value[0] if value else None
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        else:
+            return float(value)
+
+    return None
+
+class JsonStream: # incremental reader of one JSON document: the structure one token at a time, chosen values whole
+
+    CHUNK = 1 << 16
+    WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self): # reads the next chunk, dropping what was consumed already, False at the end of the document
+
+        chunk = self.stream.read(self.CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+        return True
+
+    def peek(self): # next character that isn't whitespace, "" at the end
+
+        while True:
+            self.position = self.WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return ""
+
+    def take(self, expected): # consumes the next character, one of expected
+
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValueError("expected one of %s, got %r" % (expected, char or "end of file"))
+        self.position += 1
+
+        return char
+
+    def value(self): # decodes the next complete value
+
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.eof: # a number at the end of the buffer may go on in the next chunk
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def members(self): # keys of the object starting here, the caller reads or skips the value of each
+
+        self.take("{")
+        if self.peek() == "}":
+            self.take("}")
+            return
+
+        while True:
+            key = self.value()
+            self.take(":")
+            yield key
+            if self.take(",}") == "}":
+                return
+
+    def items(self): # one step per item of the array starting here, the caller reads each
+
+        self.take("[")
+        if self.peek() == "]":
+            self.take("]")
+            return
+
+        while True:
+            yield
+            if self.take(",]") == "]":
+                return
+
+def sadf_records(stream): # ("host", fields), ("statistics", record) and ("restarts", list) of sadf -j output, one record at a time
+
+    document = JsonStream(stream)
+
+    for key in document.members():
+        if key != "sysstat":
+            document.value()
+            continue
+        for key in document.members():
+            if key != "hosts":
+                document.value()
+                continue
+            for host in document.items():
+                fields = {}
+                for key in document.members():
+                    if key == "statistics":
+                        yield "host", fields
+                        for record in document.items():
+                            yield "statistics", document.value()
+                    else:
+                        fields[key] = document.value()
+                        if key == "restarts":
+                            yield "restarts", fields[key]
+
+def sar_header(sarfile): # (hostname, day) from the header of a sar file, without parsing the rest ((None, None) when unreadable)
+
+    try:
+        input_format = sar_format(sarfile)
+        if input_format == "binary":
+            with open_sar(sarfile, "rb") as data:
+                safile = SaFile(data.read(1 << 16)) # header and activity list only
+                return safile.nodename, safile.graphdate
+
+        with open_sar(sarfile) as data:
+            if input_format == "json":
+                for kind, value in sadf_records(data):
+                    if kind == "host":
+                        return value.get("nodename"), normalize_graphdate(value["file-date"]) if "file-date" in value else None
+                return None, None
+            return text_header(data.readline())
+
+    except (OSError, EOFError, lzma.LZMAError, ValueError, struct.error, AttributeError, LookupError):
+        return None, None
+
+def text_header(first_line): # (hostname, graphdate) from the first line of sar text output, raises AttributeError when it isn't one
+
+    return re.search(r"\((.*?)\)", first_line).group(1), normalize_graphdate(re.search(r"(?<=\s)\d+[-/]\d+[-/]\d+", first_line).group(0))
+
+PRUNED_DIRS = frozenset(["proc", "sys"]) # pseudo file system snapshots in sosreports, huge and without sar files
+SOS_COMMANDS_KEPT = frozenset(["sar"]) # the only sos_commands plugin output xp looks into
+DISCOVERY_THREADS = 16 # directories listed at the same time, listings mostly wait on (network) storage
+
+def pruned_dir(parent, name): # subtrees xp doesn't descend into
+
+    return name in PRUNED_DIRS or (os.path.basename(parent) == "sos_commands" and name not in SOS_COMMANDS_KEPT)
+
+def sar_names(files): # names of the sar files (and archives) among the files of one directory
+
+    text_days = set(name[3:5] for name in files if SAR_FILE.match(name))
+
+    for name in files:
+        binary = SA_FILE.match(name)
+        if SAR_FILE.match(name) or TAR_FILE.match(name) or (binary and binary.group(1) not in text_days): # sa2 writes sarNN from saNN, no need for both
+            yield name
+
+def scan_dirs(top, max_depth = None, threads = DISCOVERY_THREADS): # yields (directory, file names) as listings complete, while the walk goes on
+
+    results = queue.Queue()
+    seen = set() # (device, inode) of every directory queued, symlink loops and directories linked twice are listed once
+    outstanding = [1] # directories queued and not yet yielded, children are counted before their parent is done
+    lock = threading.Lock()
+    stopped = threading.Event() # the caller is gone, directories still queued aren't listed
+
+    def visit(path, depth):
+        if stopped.is_set():
+            return
+        subdirs, files = [], []
+        try:
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir():
+                                if (max_depth is None or depth < max_depth) and not pruned_dir(path, entry.name):
+                                    stat = entry.stat()
+                                    subdirs.append((entry.path, (stat.st_dev, stat.st_ino)))
+                            elif entry.is_file():
+                                files.append(entry.name)
+                        except OSError: # dangling links, entries gone meanwhile
+                            continue
+            except OSError: # unreadable directories are skipped like os.walk does
+                pass
+
+            for subdir, identity in subdirs:
+                with lock:
+                    if identity in seen:
+                        continue
+                    seen.add(identity)
+                    outstanding[0] += 1
+                pool.submit(visit, subdir, depth + 1)
+        finally:
+            results.put((path, files))
+
+    top = os.path.abspath(top)
+    stat = os.stat(top)
+    seen.add((stat.st_dev, stat.st_ino))
+
+    pool = futures.ThreadPoolExecutor(threads)
+    try:
+        pool.submit(visit, top, 0)
+        while True:
+            path, files = results.get()
+            yield path, files
+            with lock:
+                outstanding[0] -= 1
+                if not outstanding[0]:
+                    break
+    finally:
+        stopped.set()
+        pool.shutdown(wait = True)
+
+FINGERPRINT_BLOCK = 64 * 1024 # bytes hashed from the start and the end of a file
+
+def file_fingerprint(path): # size and hash of the first and last block of the file as stored, changes whenever the file does
+
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size = 16)
+    with open(path, "rb") as data:
+        digest.update(data.read(FINGERPRINT_BLOCK))
+        if size > FINGERPRINT_BLOCK:
+            data.seek(max(size - FINGERPRINT_BLOCK, FINGERPRINT_BLOCK))
+            digest.update(data.read())
+
+    return size, digest.hexdigest()
+
+def sar_fingerprint(sarfile, stream = None): # size and hash of the first and last block of the decompressed content, equal for copies of one day however stored
+
+    digest = hashlib.blake2b(digest_size = 16)
+    with open_sar(sarfile, "rb") if stream is None else contextlib.nullcontext(stream) as data:
+        head = data.read(FINGERPRINT_BLOCK)
+        digest.update(head)
+        if stream is None and not sarfile.endswith((".gz", ".bz2", ".xz")): # plain file, the tail is a seek away
+            size = os.fstat(data.fileno()).st_size
+            if size > FINGERPRINT_BLOCK:
+                data.seek(max(size - FINGERPRINT_BLOCK, FINGERPRINT_BLOCK))
+                digest.update(data.read())
+        else: # compressed data or an archive member has to be read through
+            size, tail = len(head), b""
+            for chunk in iter(lambda: data.read(1 << 20), b""):
+                size += len(chunk)
+                tail = (tail + chunk)[-FINGERPRINT_BLOCK:]
+            digest.update(tail)
+
+    return size, digest.hexdigest()
+
+def head_key(size, head): # cheap identity of a sar day's content: its size (None when unknown without reading it all) and a hash of the first block
+
+    return size, hashlib.blake2b(head, digest_size = 16).hexdigest()
+
+def sar_head_key(sarfile): # head_key of a file, compressed ones are only decompressed as far as the first block
+
+    with open_sar(sarfile, "rb") as data:
+        head = data.read(FINGERPRINT_BLOCK)
+
+    return head_key(None if sarfile.endswith((".gz", ".bz2", ".xz")) else os.path.getsize(sarfile), head)
+
+def tar_members(archive): # (member path, hostname, day, head_key, mtime) of the sar files in a tar archive, only their first block is read
+
+    with tarfile.open(archive, "r|*") as tar:
+        for member in tar:
+            if member.isfile() and SAR_FILE.match(os.path.basename(member.name)):
+                head = tar.extractfile(member).read(FINGERPRINT_BLOCK)
+                try:
+                    hostname, day = text_header(head.split(b"\n", 1)[0].decode(locale.getpreferredencoding(False), "replace"))
+                except (AttributeError, LookupError): # not sar text output, get_data reports it
+                    hostname, day = None, None
+                yield os.path.join(archive, member.name), hostname, day, head_key(member.size, head), member.mtime
+
+def member_fingerprints(archive, members): # {member path: sar_fingerprint} of some members of a tar archive, in one sequential pass
+
+    fingerprints = {}
+    with tarfile.open(archive, "r|*") as tar:
+        for member in tar:
+            name = os.path.join(archive, member.name)
+            if name in members:
+                fingerprints[name] = sar_fingerprint(name, io.BufferedReader(MemberReader(tar.extractfile(member)), 1 << 16))
+
+    return fingerprints
+
+def dedupe_sarfiles(sarfiles): # one file per sar day (host and date): of identical copies the one in the largest timeline, the newest of differing ones
+
+    days = {} # (hostname, day): [[path, head_key, mtime, timeline]]
+    kept = []
+    archives = {} # archive: paths of its sar members
+    found = 0
+    for sarfile in sarfiles: # may still be coming in from scan_dirs
+        if TAR_FILE.match(sarfile):
+            try:
+                members = list(tar_members(sarfile))
+            except (tarfile.TarError, OSError, EOFError, lzma.LZMAError): # sar_sources reports it
+                found += 1
+                kept.append(sarfile)
+                continue
+            archives[sarfile] = [name for name, hostname, day, key, mtime in members]
+            for name, hostname, day, key, mtime in members:
+                found += 1
+                if day is None:
+                    kept.append(name)
+                else:
+                    days.setdefault((hostname, day), []).append([name, key, mtime, (sarfile, hostname)])
+            continue
+
+        found += 1
+        hostname, day = sar_header(sarfile)
+        try:
+            mtime = os.path.getmtime(sarfile)
+        except OSError:
+            day = None
+        if day is None: # unreadable files get_data reports
+            kept.append(sarfile)
+        else:
+            days.setdefault((hostname, day), []).append([sarfile, None, mtime, (os.path.dirname(sarfile), hostname)]) # keyed only when the day repeats
+
+    # days of every timeline group_sarfiles will make, identical copies go where they keep the most days together
+    timeline_days = collections.Counter(copy[3] for copies in days.values() for copy in copies)
+
+    # copies are told apart by size and first block, those that tie on that are read through (files right away, archive members in one pass per archive below)
+    read_through = {}
+    for copies in days.values():
+        if len(copies) < 2:
+            continue
+        for copy in copies:
+            if copy[1] is None:
+                try:
+                    copy[1] = sar_head_key(copy[0])
+                except (OSError, EOFError, lzma.LZMAError):
+                    copy[1] = (None, copy[0])
+        for copy in copies:
+            (size, head), others = copy[1], [other[1] for other in copies if other is not copy]
+            if any(other_head == head and (other_size == size or None in (other_size, size)) for other_size, other_head in others):
+                read_through[copy[0]] = copy
+
+    pending = {}
+    for name, copy in read_through.items():
+        archive, member = archive_member(name)
+        if member is None:
+            try:
+                copy[1] = sar_fingerprint(name)
+            except (OSError, EOFError, lzma.LZMAError):
+                copy[1] = (None, name)
+        else:
+            pending.setdefault(archive, set()).add(name)
+    for archive, members in pending.items():
+        try:
+            fingerprints = member_fingerprints(archive, members)
+        except (tarfile.TarError, OSError, EOFError, lzma.LZMAError):
+            fingerprints = {}
+        for name in members:
+            read_through[name][1] = fingerprints.get(name, (None, name))
+
+    for copies in days.values():
+        distinct = {}
+        for copy in copies:
+            distinct.setdefault(copy[1], []).append(copy)
+        # a later copy of a day is a longer one (sadc appends all day)
+        same = max(distinct.values(), key = lambda same: max((copy[2], copy[0]) for copy in same)) if len(distinct) > 1 else next(iter(distinct.values()))
+        # of identical copies the one in the timeline with the most days, then plain files before archive members, then by path
+        kept.append(min(same, key = lambda copy: (-timeline_days[copy[3]], archive_member(copy[0])[1] is not None, copy[0]))[0])
+
+    if len(kept) < found:
+        print("Skipping %d copies of sar days found more than once." % (found - len(kept)))
+
+    # an archive none of whose members were dropped is read whole, as before
+    kept = set(kept)
+    for archive, members in archives.items():
+        if kept.issuperset(members):
+            kept.difference_update(members)
+            kept.add(archive)
+
+    return sorted(kept)
+
+def group_sarfiles(sarfiles): # lists of the files xp found that make one timeline: same directory and host, a tar archive on its own
+
+    groups = {}
+    for sarfile in sarfiles:
+        archive, member = archive_member(sarfile)
+        key = (archive, None) if TAR_FILE.match(sarfile) or member else (os.path.dirname(sarfile), sar_header(sarfile)[0])
+        groups.setdefault(key, []).append(sarfile)
+
+    return [sorted(files) for key, files in sorted(groups.items(), key = lambda item: (item[0][0], item[0][1] or ""))]
+
+class TimeWindow: # --from/--to window as naive epoch seconds (None = open), tests the clocks of one sar file at a time
+
+    FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d")
+    SPAN = re.compile(r"^([+-])(\d+)([smhd])$")
+    UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    def __init__(self, start = None, end = None):
+        self.start = start
+        self.end = end
+        self.seconds = {} # clock to seconds since midnight, shared by all files
+        self.day(0)
+
+    @classmethod
+    def from_arguments(cls, start, end, now = None): # absolute datetimes or spans like -2h / +90m, raises ValueError
+
+        # a span is relative to the other bound when that one is absolute, to now otherwise
+        if now is None:
+            now = calendar.timegm(datetime.datetime.now().timetuple())
+
+        bounds = [cls.absolute(start), cls.absolute(end)]
+        for num, (value, other) in enumerate(((start, bounds[1]), (end, bounds[0]))):
+            if value is not None and bounds[num] is None:
+                sign, amount, unit = cls.SPAN.match(value).groups()
+                bounds[num] = (now if other is None else other) + (-1 if sign == "-" else 1) * int(amount) * cls.UNITS[unit]
+
+        if None not in bounds and bounds[0] > bounds[1]:
+            raise ValueError("--from is after --to")
+
+        return cls(*bounds)
+
+    @classmethod
+    def absolute(cls, value): # epoch of an absolute datetime, None for spans and no value
+
+        if value is None or cls.SPAN.match(value):
+            return None
+
+        for fmt in cls.FORMATS:
+            try:
+                return calendar.timegm(datetime.datetime.strptime(value, fmt).timetuple())
+            except ValueError:
+                pass
+
+        raise ValueError("Unknown time format: %s" % value)
+
+    def overlaps(self, start, end): # whether [start, end] has anything in the window
+        return (self.start is None or end >= self.start) and (self.end is None or start <= self.end)
+
+    def covers_day(self, day): # whether the window may include a day of month (sarNN), open windows include all
+        if self.start is None or self.end is None or self.end - self.start >= 31 * 86400:
+            return True
+        first, last = (datetime.date(*time.gmtime(bound)[:3]) for bound in (self.start, self.end))
+        return any((first + datetime.timedelta(days)).day == day for days in range((last - first).days + 1))
+
+    def day(self, midnight): # starts testing the clocks of a file of the day starting at midnight
+        self.low = -float("inf") if self.start is None else self.start - midnight
+        self.high = float("inf") if self.end is None else self.end - midnight
+        self.section()
+
+    def section(self): # every section starts from the first clock of the file again
+        self.offset = 0
+        self.last = 0
+
+    def contains(self, clock): # whether a clock ("hh:mm:ss[AM|PM]") of the current section is in the window
+
+        second = self.seconds.get(clock)
+        if second is None:
+            try:
+                second = self.seconds[clock] = clock_seconds(clock)
+            except ValueError: # not a clock, the caller sorts the row out
+                return True
+
+        second += self.offset
+        if second < self.last - 43200: # past midnight
+            self.offset += 86400
+            second += 86400
+        self.last = second
+
+        return self.low <= second <= self.high
+
+    def mask(self, times): # boolean mask of epoch timestamps in the window
+
+        keep = np.ones(len(times), dtype = bool)
+        if self.start is not None:
+            keep &= times >= self.start
+        if self.end is not None:
+            keep &= times <= self.end
+
+        return keep
+
+    def apply(self, data_struct): # the sections and restarts of one graphdate limited to the window
+
+        limited = {}
+        for name, section in data_struct.items():
+            if name == "restarts":
+                limited[name] = section[self.mask(section)]
+            else:
+                limited[name] = section.select(self.mask(section.time()))
+
+        return limited
+
+    def label(self, first, last): # file name part for graphdates first to last, bounds of the window where they cut into those days
+
+        # bounds outside the days give way to them, files of other days in the same window get other names
+        start = time.strftime("%y-%m-%d_%H%M", time.gmtime(self.start)) if self.start is not None and self.start > day_start(first) else first + "_0000"
+        end = time.strftime("%y-%m-%d_%H%M", time.gmtime(self.end)) if self.end is not None and self.end < day_start(last) + 86400 else last + "_2359"
+
+        return start + "_to_" + end
+
+PARSER_VERSION = 3 # bump whenever parsing changes what ends up in SARAnalyzer.data
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "asap-graph")
+CACHE_SIZE = 512 * 1024 * 1024 # bytes, least recently used entries are evicted above it
+
+class ParseCache: # parsed sar files stored as .npz, keyed by absolute path, size, mtime and parser version
+
+    def __init__(self, path = CACHE_DIR, max_size = CACHE_SIZE, rebuild = False):
+        self.path = path
+        self.max_size = max_size
+        self.rebuild = rebuild # never hit, replace entries instead
+
+    def entry(self, sarfile, selection = None): # selection: {section: columns} of a partial parse, None for a complete one
+
+        stat = os.stat(sarfile)
+        key = "%s\0%d\0%d\0%d" % (os.path.abspath(sarfile), stat.st_size, stat.st_mtime_ns, PARSER_VERSION)
+        if selection is not None:
+            key += "\0" + json.dumps(sorted(selection.items()))
+
+        return os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest() + ".npz")
+
+    def load(self, sarfile, selection = None): # returns (meta, sections, restarts) or None, a complete entry serves any selection
+
+        if self.rebuild:
+            return None
+
+        for entry_selection in ((selection, None) if selection is not None else (None,)):
+            try:
+                entry = self.entry(sarfile, entry_selection)
+                with np.load(entry) as cached:
+                    meta = json.loads(str(cached["meta"]))
+                    sections = {}
+                    for name, columns in (selection or meta["columns"]).items():
+                        rows = [meta["columns"][name].index(column) for column in columns]
+                        values = cached[name + ".values"]
+                        values = values if rows == list(range(len(values))) else values[rows]
+                        if name in ENTITY_COLUMNS:
+                            sections[name] = EntityBuffer.from_arrays(columns, meta["entities"][name], cached[name + ".times"], values)
+                        else:
+                            sections[name] = SectionBuffer.from_arrays(columns, cached[name + ".times"], values)
+                    restarts = cached["restarts"]
+
+                os.utime(entry) # mtime is the LRU clock
+
+            except (OSError, KeyError, ValueError):
+                continue
+
+            return meta, sections, restarts
+
+        return None
+
+    def store(self, sarfile, meta, sections, restarts, selection = None):
+
+        arrays = {"meta": np.array(json.dumps(dict(meta, columns = dict((name, section.columns) for name, section in sections.items()),
+                                                   entities = dict((name, section.entities) for name, section in sections.items()
+                                                                   if name in ENTITY_COLUMNS)))),
+                  "restarts": restarts}
+        for name, section in sections.items():
+            arrays[name + ".times"] = section.time()
+            arrays[name + ".values"] = section.values[:, :section.size]
+            if name in ENTITY_COLUMNS:
+                arrays[name + ".values"] = arrays[name + ".values"][:, :, :len(section.entities)]
+
+        try:
+            os.makedirs(self.path, exist_ok = True)
+            entry = self.entry(sarfile, selection)
+            with tempfile.NamedTemporaryFile(dir = self.path, suffix = ".tmp", delete = False) as temp:
+                np.savez(temp, **arrays)
+            os.replace(temp.name, entry) # readers never see a half written entry
+            self.evict()
+
+        except OSError: # read-only or full cache dir just means no caching
+            pass
+
+    def evict(self): # removes least recently used entries until the cache fits into max_size
+
+        entries = []
+        for dirent in os.scandir(self.path):
+            if dirent.name.endswith(".npz"):
+                stat = dirent.stat()
+                entries.append((stat.st_mtime, stat.st_size, dirent.path))
+
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError: # evicted by a concurrent run
+                pass
+            total -= size
+
+class SARAnalyzer:
+
+    def __init__(self, legacy_parser = False, cache = None, window = None, sections = None):
+        self.data = {} # main data dict
+        self.hostname = ''
+        self.cpu_num = ''
+        self.legacy_parser = legacy_parser # use the old state machine in get_data (A/B comparison)
+        self.cache = cache # ParseCache or None
+        self.window = window # TimeWindow or None, data outside of it is dropped
+
+        # {section: columns} get_data captures (figure_sections), all of SECTION_COLUMNS by default
+        self.sections = SECTION_COLUMNS if sections is None else sections
+        self.selection = None if self.sections == SECTION_COLUMNS else self.sections # parse cache key of a partial parse
+
+        # headers of sections nothing is captured from aren't even looked for
+        states = set(state for state, targets in SECTION_TARGETS.items() if not self.sections.keys().isdisjoint(targets))
+        self.header_tokens = frozenset(token for tokens, versions, state, update in SECTION_HEADERS
+                                       if state in states or state == "restart" for token in tokens)
+    
+        # list of used titles
+        self.indeces = {'%usr': None, '%user': None, '%nice': None, '%sys': None, '%system': None, '%idle': None, '%iowait': None, 
+                    'cswch/s': None, 'proc/s': None, 
+                    'ldavg-1': None, 'ldavg-5': None, 'ldavg-15': None, 'runq-sz': None, 'plist-sz': None,
+                    'kbmemfree': None, 'kbmemused': None, 'kbcached': None, 'kbswpfree': None, 'kbswpused': None,
+                    'pswpin/s': None, 'pswpout/s': None,
+                    'dentunusd': None, 'file-nr': None, 'inode-nr': None, 'file-sz': None, 'inode-sz': None,
+                    'tcpsck': None, 'udpsck': None,
+                    'bread/s': None, 'bwrtn/s': None}
+    
+    def get_sars_recursively(self, wd = os.getcwd(), max_depth = None):
+
+        # headers are read for dedupe_sarfiles while the directory listings go on
+        sar_files = (os.path.join(root, name) for root, files in scan_dirs(wd, max_depth) for name in sar_names(files)) # archives are opened by sar_sources
+
+        return dedupe_sarfiles(sar_files) # sosreports and /var/log/sa copies repeat days
+    
+    def return_indeces(self, row): 
+        
+        temp_dict = {}
+        for index in self.indeces:
+            for num, dat in enumerate(row):
+                if dat in index:
+                    temp_dict.update({dat: num})
+                    
+        return temp_dict
+       
+    def parse_first_line(self, first_line): # sets hostname, RHEL version and CPU count, returns normalized graphdate
+
+        self.hostname = re.search(r"\((.*?)\)", first_line).group(1) 
+                
+        if re.search('(2.6.18)', first_line):
+            self.rhel_version = 5
+        elif re.search('(2.6.32)', first_line):
+            self.rhel_version = 6
+        elif re.search('(3.10)', first_line):
+            self.rhel_version = 7
+        elif re.search('(4.18)', first_line):
+            self.rhel_version = 8
+        else:
+            print(Bcolors.FAIL + ("FAIL: Unsupported RHEL") + Bcolors.ENDC)
+            return None
+                
+        try:
+            self.cpu_num = re.search(r"\((\d+ CPU)\)$", first_line).group(1)
+        except AttributeError:
+            self.cpu_num = ""
+                       
+        return normalize_graphdate(re.search(r"(?<=\s)\d+[-/]\d+[-/]\d+", first_line).group(0))
+
+    def resolve_header(self, row): # returns (state, update indeces) of the first matching SECTION_HEADERS entry
+
+        for tokens, versions, state, update in SECTION_HEADERS:
+            if versions is not None and self.rhel_version not in versions:
+                continue
+            if all(x in row for x in tokens):
+                return state, update
+
+        return None, False
+
+    def section_positions(self, row, names, captured): # [(section, column positions in rows, entity section)] for the sections a (24h) header feeds
+
+        titles = {TITLE_ALIASES.get(title, title): num for num, title in enumerate(row)}
+
+        targets = []
+        for name in names:
+            if name not in captured:
+                continue
+            columns = captured[name].columns
+            if all(column in titles for column in columns):
+                positions = [titles[column] for column in columns]
+                targets.append((captured[name], (positions, [num + 1 for num in positions]), name in ENTITY_COLUMNS)) # without / with AM/PM
+
+        return targets
+
+    def cache_meta(self, graphdate): # what get_data sets besides self.data
+
+        return {"graphdate": graphdate, "hostname": self.hostname, "cpu_num": self.cpu_num,
+                "rhel_version": self.rhel_version, "indeces": self.indeces}
+
+    def load_cached(self, sarfile): # fills self.data from the parse cache, True on a hit
+
+        cached = self.cache.load(sarfile, self.selection)
+        if cached is None:
+            return False
+
+        meta, sections, restarts = cached
+        self.hostname = meta["hostname"]
+        self.cpu_num = meta["cpu_num"]
+        self.rhel_version = meta["rhel_version"]
+        self.indeces.update(meta["indeces"])
+
+        data_struct = dict(sections, restarts = restarts)
+        if self.window is not None:
+            midnight = day_start(meta["graphdate"])
+            if not self.window.overlaps(midnight, midnight + 86400):
+                return True
+            data_struct = self.window.apply(data_struct)
+
+        self.data[meta["graphdate"]] = data_struct
+
+        return True
+
+    def get_data(self, sarfile, stream = None): # stream: already open text stream of sarfile (archive member)
+
+        if stream is None:
+            input_format = sar_format(sarfile)
+            if input_format == "binary":
+                return self.get_data_binary(sarfile)
+            if input_format == "json":
+                return self.get_data_json(sarfile)
+
+        if self.legacy_parser:
+            return self.get_data_legacy(sarfile, stream)
+
+        print('Processing "%s"...' % sarfile)
+
+        if self.cache is not None and stream is None and self.load_cached(sarfile):
+            return
+
+        captured = {name: new_section(name, columns) for name, columns in self.sections.items()}
+        header_tokens = self.header_tokens
+        restarts = []
+        clocks = {} # shared index of the distinct clocks of the file, sections store ids into it until the end
+
+        try:
+            with sar_lines(sarfile, stream, tuple(token.encode() for token in header_tokens)) as lines:
+
+                data = iter(lines)
+                first_line = next(data, "").rstrip()
+
+                graphdate = self.parse_first_line(first_line)
+                if not graphdate:
+                    return
+
+                midnight = day_start(graphdate)
+
+                window = self.window
+                if window is not None:
+                    if not window.overlaps(midnight, midnight + 86400):
+                        return
+                    window.day(midnight)
+
+                # decimal separator is decided once per file from the first captured number
+                decimal = re.compile(r"\d([.,])\d")
+                commas = None
+
+                targets = None # [(section, column positions, entity section)] the current section is captured into, None when not capturing
+                entities = False # rows start with a CPU / device name
+                only_all = False
+
+                for line in data:
+                    row = line.split()
+                    if not row: # blank
+                        continue
+
+                    if targets is not None:
+                        if row[0] in AVERAGE_LABELS: # end of section
+                            targets = None
+                            continue
+
+                        if only_all and "all" not in row:
+                            continue
+
+                        if window is not None and not window.contains(row[0] + row[1] if list_get(row, 1) in AM_PM else row[0]):
+                            continue
+
+                        if commas is None:
+                            separator = decimal.search(line)
+                            if separator:
+                                commas = re.compile(r"(?<=\d),(?=\d)") if separator.group(1) == "," else False
+                        if commas:
+                            row = commas.sub('.', line).split()
+
+                        try:
+                            if row[1] in AM_PM: # clock in two tokens, values one further
+                                clock = row[0] + row[1]
+                                shift = 1
+                            else:
+                                clock = row[0]
+                                shift = 0
+                            # "all" rows feed the plain sections, the rows of single CPUs / devices the entity ones
+                            entity = row[1 + shift] if entities else None
+                            values = [(section, [float(row[num]) for num in positions[shift]], per_entity) for section, positions, per_entity in targets
+                                      if not entities or (entity == "all") != per_entity]
+                        except (ValueError, IndexError): # RESTART or repeated header inside a section
+                            if "RESTART" in row:
+                                restarts.append(clocks.setdefault(clock, len(clocks)))
+                            continue
+
+                        clock_id = clocks.setdefault(clock, len(clocks))
+                        for section, value, per_entity in values:
+                            if per_entity:
+                                section.append(clock_id, entity, value)
+                            else:
+                                section.append(clock_id, value)
+
+                    elif not header_tokens.isdisjoint(row): # header or RESTART
+                        clock = row[0] + row[1] if list_get(row, 1) in AM_PM else row[0]
+                        normalize_am_pm(row)
+                        state, update = self.resolve_header(row)
+
+                        if state == "restart":
+                            restarts.append(clocks.setdefault(clock, len(clocks)))
+                        elif state:
+                            if update:
+                                self.indeces.update(self.return_indeces(row))
+                            targets = self.section_positions(row, SECTION_TARGETS[state], captured) or None # nothing captured from it
+                            entities = state in ENTITY_STATES
+                            only_all = state == "cpu_capturing" and not any(per_entity for section, positions, per_entity in targets or ())
+                            if window is not None:
+                                window.section()
+
+                # every distinct clock is parsed once, for all sections
+                seconds = parse_clocks(list(clocks))
+
+                for section in captured.values():
+                    section.resolve_clocks(seconds, midnight)
+                    section.trim()
+
+                # every section repeats the RESTART line
+                restarts = np.unique(midnight + unroll_midnight(seconds[np.array(restarts, dtype = np.intp)]))
+                if window is not None:
+                    restarts = restarts[window.mask(restarts)]
+
+                self.data[graphdate] = dict(captured, restarts = restarts)
+
+                if self.cache is not None and window is None and stream is None: # only whole files on disk are cached
+                    self.cache.store(sarfile, self.cache_meta(graphdate), captured, restarts, self.selection)
+
+        except ValueError:
+            print(Bcolors.FAIL + ("FAIL: Error capturing %s data!" % sarfile) + Bcolors.ENDC)
+            return
+
+        except FileNotFoundError:
+            print(Bcolors.FAIL + ("FAIL: %s not found!" % sarfile) + Bcolors.ENDC)
+            return
+
+        except AttributeError:
+            print(Bcolors.FAIL + ("FAIL: Check %s validity" % sarfile) + Bcolors.ENDC)
+            return
+
+        except PermissionError:
+            print(Bcolors.FAIL + ("FAIL: Permission denied!") + Bcolors.ENDC)
+
+        except (OSError, EOFError, lzma.LZMAError): # broken compressed files
+            print(Bcolors.FAIL + ("FAIL: Can't read %s!" % sarfile) + Bcolors.ENDC)
+
+    def get_data_binary(self, sarfile): # decodes a binary saNN file straight into sections, without the text round trip
+
+        print('Processing "%s"...' % sarfile)
+
+        if self.cache is not None and self.load_cached(sarfile):
+            return
+
+        try:
+            safile = SaFile(sa_data(sarfile))
+
+            self.hostname = safile.nodename
+            self.cpu_num = "%d CPU" % max(safile.cpu_nr - 1, 1) # CPU items include "all"
+            self.rhel_version = None # only the text parser needs it
+
+            graphdate = safile.graphdate
+            midnight = day_start(graphdate)
+            if self.window is not None and not self.window.overlaps(midnight, midnight + 86400):
+                return
+
+            data_struct = safile.sections(dict((name, columns) for name, columns in self.sections.items() if name not in ENTITY_COLUMNS), midnight)
+            for name, columns in self.sections.items(): # per-CPU / per-device records aren't decoded
+                if name in ENTITY_COLUMNS:
+                    data_struct[name] = EntityBuffer(columns, capacity = 1)
+
+            if self.cache is not None and self.window is None:
+                self.cache.store(sarfile, self.cache_meta(graphdate), dict((name, section) for name, section in data_struct.items() if name != "restarts"),
+                                 data_struct["restarts"], self.selection)
+
+            self.data[graphdate] = data_struct if self.window is None else self.window.apply(data_struct)
+
+        except (ValueError, struct.error) as error:
+            print(Bcolors.FAIL + ("FAIL: Can't decode %s: %s" % (sarfile, error)) + Bcolors.ENDC)
+
+        except PermissionError:
+            print(Bcolors.FAIL + ("FAIL: Permission denied!") + Bcolors.ENDC)
+
+        except (OSError, EOFError, lzma.LZMAError): # broken compressed files
+            print(Bcolors.FAIL + ("FAIL: Can't read %s!" % sarfile) + Bcolors.ENDC)
+
+    def get_data_json(self, sarfile): # sadf -j output, streamed: every record goes straight into the sections of its day
+
+        print('Processing "%s"...' % sarfile)
+
+        paths = dict((name, [SADF_COLUMNS[column] for column in columns]) for name, columns in self.sections.items() if name not in ENTITY_COLUMNS)
+        entity_sections = dict((name, columns) for name, columns in self.sections.items() if name in ENTITY_COLUMNS)
+        days = {} # graphdate: (sections, restarts, midnight)
+
+        host_utc = [False] # whether the host clock is UTC, then UTC timestamps are its local time as well
+
+        def local(stamp): # the text and binary readers plot the host's local clock, sadf prints UTC unless run with -t
+            if stamp.get("utc") and not host_utc[0]:
+                raise ValueError("timestamps are UTC, not the host's local time, convert the file with sadf -t -j")
+            return stamp
+
+        def day(date): # "YYYY-MM-DD"
+            graphdate = date[2:]
+            if graphdate not in days:
+                days[graphdate] = (dict((name, new_section(name, columns)) for name, columns in self.sections.items()), [], day_start(graphdate))
+            return days[graphdate]
+
+        try:
+            with open_sar(sarfile) as data:
+                for kind, value in sadf_records(data):
+
+                    if kind == "host":
+                        self.hostname = value.get("nodename", "")
+                        self.cpu_num = "%d CPU" % value["number-of-cpus"] if "number-of-cpus" in value else ""
+                        self.rhel_version = None # only the text parser needs it
+                        host_utc[0] = value.get("timezone") in UTC_ZONES # sysstat 11.7 on, older versions don't say
+
+                    elif kind == "statistics":
+                        stamp = value.get("timestamp")
+                        if not stamp: # empty record of a restart
+                            continue
+                        sections, restarts, midnight = day(local(stamp)["date"])
+                        timestamp = midnight + clock_seconds(stamp["time"])
+                        for name, columns in paths.items():
+                            values = [sadf_value(value, column) for column in columns]
+                            if None not in values:
+                                sections[name].append(timestamp, values)
+                        for name, columns in entity_sections.items():
+                            for entity, values in sadf_entities(value, name, columns):
+                                sections[name].append(timestamp, entity, values)
+
+                    elif kind == "restarts":
+                        for restart in value:
+                            boot = restart.get("boot", {})
+                            if "date" in boot and "time" in boot:
+                                sections, restarts, midnight = day(local(boot)["date"])
+                                restarts.append(midnight + clock_seconds(boot["time"]))
+
+        except (ValueError, KeyError, TypeError) as error:
+            print(Bcolors.FAIL + ("FAIL: Can't decode %s: %s" % (sarfile, error)) + Bcolors.ENDC)
+            return
+
+        except PermissionError:
+            print(Bcolors.FAIL + ("FAIL: Permission denied!") + Bcolors.ENDC)
+            return
+
+        except (OSError, EOFError, lzma.LZMAError): # broken compressed files
+            print(Bcolors.FAIL + ("FAIL: Can't read %s!" % sarfile) + Bcolors.ENDC)
+            return
 
-class Bcolors: # just class for colors
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
+        for graphdate, (sections, restarts, midnight) in days.items():
+            if self.window is not None and not self.window.overlaps(midnight, midnight + 86400):
+                continue
+            for section in sections.values():
+                section.trim()
+            data_struct = dict(sections, restarts = np.unique(np.array(restarts, dtype = np.int64)))
+            self.data[graphdate] = data_struct if self.window is None else self.window.apply(data_struct)
 
-class SARAnalyzer:
-        
-    def __init__(self):
-        self.data = {} # main data dict
-        self.hostname = ''
-        self.cpu_num = ''
-    
-        # list of used titles
-        self.indeces = {'%usr': None, '%user': None, '%nice': None, '%sys': None, '%system': None, '%idle': None, '%iowait': None, 
-                    'cswch/s': None, 'proc/s': None, 
-                    'ldavg-1': None, 'ldavg-5': None, 'ldavg-15': None, 'runq-sz': None, 'plist-sz': None,
-                    'kbmemfree': None, 'kbmemused': None, 'kbcached': None, 'kbswpfree': None, 'kbswpused': None,
-                    'pswpin/s': None, 'pswpout/s': None,
-                    'dentunusd': None, 'file-nr': None, 'inode-nr': None, 'file-sz': None, 'inode-sz': None,
-                    'tcpsck': None, 'udpsck': None,
-                    'bread/s': None, 'bwrtn/s': None}
-    
-    def get_sars_recursively(self, wd = os.getcwd()):
-     
-        sar_files_list = []
-                           
-        for root, dirs, files in os.walk(wd):            
-            for sarfiles in files:
-
-                sarfile = re.match('sar\d{2}$', sarfiles) 
-                                        
-                if sarfile:
-                    file_with_path = os.path.join(os.path.abspath(root), sarfiles)
-                    sar_files_list.append(file_with_path)
-                    
-        return sar_files_list
-    
-    def return_indeces(self, row): 
-        
-        temp_dict = {}
-        for index in self.indeces:
-            for num, dat in enumerate(row):
-                if dat in index:
-                    temp_dict.update({dat: num})
-                    
-        return temp_dict
-       
-    def get_data(self, sarfile):
+    def columnize_legacy(self, graphdate, captured): # converts the split rows of get_data_legacy into SectionBuffers
+
+        midnight = day_start(graphdate)
+
+        titles = dict((column, column) for columns in SECTION_COLUMNS.values() for column in columns)
+        if self.rhel_version == 5:
+            titles.update(dict((column, title) for title, column in TITLE_ALIASES.items()))
+            captured["swp_captured"] = captured["mem_captured"] # RHEL5 has kbswpfree in the memory table
+
+        clocks = {}
+
+        data = {}
+        for name, columns in SECTION_COLUMNS.items():
+            section = SectionBuffer(columns, capacity = max(len(captured[name]), 1))
+            positions = [self.indeces.get(titles[column]) for column in columns]
+            for row in captured[name]:
+                section.append(clocks.setdefault(row[0], len(clocks)), [float(row[num]) for num in positions])
+            data[name] = section
+
+        restarts = [clocks.setdefault(x, len(clocks)) for x in captured["restarts"]]
+
+        seconds = parse_clocks(list(clocks))
+        for section in data.values():
+            section.resolve_clocks(seconds, midnight)
+
+        data["restarts"] = midnight + unroll_midnight(seconds[np.array(restarts, dtype = np.intp)])
+
+        for name, columns in self.sections.items(): # not captured by the legacy parser
+            if name in ENTITY_COLUMNS:
+                data[name] = EntityBuffer(columns, capacity = 1)
+
+        return data
+
+    def get_data_legacy(self, sarfile, stream = None): # the original line-by-line state machine, kept for A/B comparison
         
         print('Processing "%s"...' % sarfile)
                                
@@ -161,7 +1863,7 @@ class SARAnalyzer:
         graphdate = ''
       
         try:
-            with open(sarfile, "r") as data:
+            with open_sar(sarfile) if stream is None else contextlib.nullcontext(stream) as data:
                         
                 state = "default" # state for not capturing 
                 
@@ -169,41 +1871,10 @@ class SARAnalyzer:
                                 
                 commas = re.compile("(?<=\d),(?=\d)") # workaround to deal with different locales (e.g. comma instead of dot)
                 
-                self.hostname = re.search(r"\((.*?)\)", first_line).group(1) 
-                
-                if re.search('(2.6.18)', first_line):
-                    self.rhel_version = 5
-                elif re.search('(2.6.32)', first_line):
-                    self.rhel_version = 6
-                elif re.search('(3.10)', first_line):
-                    self.rhel_version = 7
-                elif re.search('(4.18)', first_line):
-                    self.rhel_version = 8
-                else:
-                    print(Bcolors.FAIL + ("FAIL: Unsupported RHEL") + Bcolors.ENDC)
+                graphdate = self.parse_first_line(first_line)
+                if not graphdate:
                     return
-                
-                try:
-                    self.cpu_num = re.search(r"\((\d+ CPU)\)$", first_line).group(1)
-                except AttributeError:
-                    self.cpu_num = ""
-                       
-                graphdateparts = re.search('(?<=\s)(?:(\d+)([-/])(\d+)[-/](\d+))', first_line).groups() # 
-                
-                # Normalize graphdate
-
-                # year(four digits)-month-day
-                if graphdateparts[1] == "-":
-                    graphdate = "%s-%s-%s" % (graphdateparts[0][-2:], graphdateparts[2], graphdateparts[3])
-                # month-day-year(two digits)
-                elif graphdateparts[1] == "/" and len(graphdateparts[3]) == 2:
-                    graphdate = "%s-%s-%s" % (graphdateparts[3], graphdateparts[0], graphdateparts[2])
-                # month-day-year(four digits)    
-                elif graphdateparts[1] == "/" and len(graphdateparts[3]) == 4:
-                    graphdate = "%s-%s-%s" % (graphdateparts[3][-2:], graphdateparts[0], graphdateparts[2])
-                else:
-                    raise LookupError("Unknown graph date format: %s" % str(graphdateparts))
-                
+
                 for line in data:                    
                     if line == '\n':
                         continue                        
@@ -326,894 +1997,772 @@ class SARAnalyzer:
                                 blocks_captured.append(row)
                         
 
-                        
-                # Dict of dicts of our data (graphdate for contacanation)
-                self.data[graphdate] = {
-                                        
-                    "cpu_captured": cpu_captured,
-                    "procs_captured": procs_captured,
-                    "cswch_captured": cswch_captured,                    
-                    "load_captured": load_captured,                    
-                    "mem_captured": mem_captured,                    
-                    "swp_captured": swp_captured,                    
-                    "pswp_captured": pswp_captured,                    
-                    "misc_captured": misc_captured,                    
-                    "sck_captured": sck_captured,
-                    "blocks_captured": blocks_captured,                    
-                    "restarts": restarts,
-                    
-                }
-        except ValueError:
-            print(Bcolors.FAIL + ("FAIL: Error capturing %s data!" % sarfile) + Bcolors.ENDC)  
-            return
-            
-        except FileNotFoundError:
-            print(Bcolors.FAIL + ("FAIL: %s not found!" % sarfile) + Bcolors.ENDC)
-            return
-        
-        except AttributeError:
-            print(Bcolors.FAIL + ("FAIL: Check %s validity" % sarfile) + Bcolors.ENDC)
-            return
-        
-        except PermissionError:
-            print(Bcolors.FAIL + ("FAIL: Permission denied!") + Bcolors.ENDC)
-        
-    # Method for generating the graphs
-                
-    def generate_graphs(self, file_prefix = None,
-                    plot_all = False,
-                    plot_overview = True,
-                    plot_cpu = False,
-                    plot_load = False,
-                    plot_memory = False,
-                    plot_misc = False,
-                    plot_blocks = False, 
-                    save_path = None
-    ):              
-        
-        if plot_all == True:
-            plot_overview = True
-            plot_cpu = True
-            plot_load = True
-            plot_memory = True
-            plot_misc = True
-            plot_blocks = True
-        
-        default = [plot_all, plot_overview, plot_cpu, plot_load, plot_memory, plot_misc, plot_blocks] # complicated as was not able to find default for 'docopt'
-        
-        if not any(default):
-            plot_overview = True
-                       
-        if not file_prefix:
-            ks = sorted(self.data.keys()) # sorted keys (graph dates)
-            if not ks:
-                return
+                        
+                # Dict of dicts of our data (graphdate for contacanation)
+                self.data[graphdate] = self.columnize_legacy(graphdate, {
+                                        
+                    "cpu_captured": cpu_captured,
+                    "procs_captured": procs_captured,
+                    "cswch_captured": cswch_captured,                    
+                    "load_captured": load_captured,                    
+                    "mem_captured": mem_captured,                    
+                    "swp_captured": swp_captured,                    
+                    "pswp_captured": pswp_captured,                    
+                    "misc_captured": misc_captured,                    
+                    "sck_captured": sck_captured,
+                    "blocks_captured": blocks_captured,                    
+                    "restarts": restarts,
+                    
+                })
+
+                if self.window is not None:
+                    midnight = day_start(graphdate)
+                    if self.window.overlaps(midnight, midnight + 86400):
+                        self.data[graphdate] = self.window.apply(self.data[graphdate])
+                    else:
+                        del self.data[graphdate]
+        except ValueError:
+            print(Bcolors.FAIL + ("FAIL: Error capturing %s data!" % sarfile) + Bcolors.ENDC)  
+            return
+            
+        except FileNotFoundError:
+            print(Bcolors.FAIL + ("FAIL: %s not found!" % sarfile) + Bcolors.ENDC)
+            return
+        
+        except AttributeError:
+            print(Bcolors.FAIL + ("FAIL: Check %s validity" % sarfile) + Bcolors.ENDC)
+            return
+        
+        except PermissionError:
+            print(Bcolors.FAIL + ("FAIL: Permission denied!") + Bcolors.ENDC)
+
+        except (OSError, EOFError, lzma.LZMAError): # broken compressed files
+            print(Bcolors.FAIL + ("FAIL: Can't read %s!" % sarfile) + Bcolors.ENDC)
+        
+    def concat_section(self, name): # joins a section over all graphdates, returns (datetime64 time, {metric: array}, day ends)
+
+        sections = [data_struct[name] for graphdate, data_struct in sorted(self.data.items())]
+
+        time = np.concatenate([section.datetimes() for section in sections])
+        columns = dict((column, np.concatenate([section[column] for section in sections])) for column in sections[0].columns)
+        ends = np.cumsum([len(section) for section in sections], dtype = np.int64)
+
+        return time, columns, ends
+
+    def concat_entities(self, name): # joins an entity section over all graphdates on the union of their entities, returns (datetime64 time, {metric: time x entity array}, entity names)
+
+        sections = [data_struct[name] for graphdate, data_struct in sorted(self.data.items())]
+
+        entities = list(dict.fromkeys(entity for section in sections for entity in section.entities))
+        index = dict((entity, num) for num, entity in enumerate(entities))
+
+        time = np.concatenate([section.datetimes() for section in sections])
+        columns = {}
+        for column in sections[0].columns:
+            joined = np.full((len(time), len(entities)), np.nan, dtype = sections[0].values.dtype)
+            row = 0
+            for section in sections:
+                joined[row:row + len(section), [index[entity] for entity in section.entities]] = section[column]
+                row += len(section)
+            columns[column] = joined
+
+        return time, columns, np.array(entities, dtype = str)
+
+    def summary(self): # {period: {metric: {stat: value}}} of every captured metric, per graphdate and over all of them
+
+        ks = sorted(self.data.keys())
+        periods = [(graphdate, [(self.data[graphdate][name].time(), self.data[graphdate][name].values[:, :len(self.data[graphdate][name])], self.data[graphdate][name].columns)
+                                for name in self.sections if name in SECTION_COLUMNS]) for graphdate in ks]
+
+        if len(ks) > 1: # the whole range, like the file names of generate_graphs
+            label = self.window.label(ks[0], ks[-1]) if self.window is not None else ks[0] + "_to_" + ks[-1]
+            periods.append((label, [(np.concatenate([day[num][0] for graphdate, day in periods]),
+                                     np.concatenate([day[num][1] for graphdate, day in periods], axis = 1), columns)
+                                    for num, (times, values, columns) in enumerate(periods[0][1])]))
+
+        summary = {}
+        for period, sections in periods:
+            metrics = summary[period] = {}
+            for times, values, columns in sections:
+                if not len(times):
+                    continue
+                for column, stats in zip(columns, metric_stats(times, values)):
+                    metrics[column] = stats
+
+        return summary
+
+    def graph_series(self, names): # arrays the panels draw: restarttime, "<section>.time" and the named PLOT_SERIES, with NaN break points in gaps
+
+        series = {}
+
+        series["restarttime"] = np.concatenate([data_struct["restarts"] for graphdate, data_struct in sorted(self.data.items())]).view("datetime64[s]")
+
+        sections = {}
+        breaks = {}
+        for name in names:
+            section, column, divisor = PLOT_SERIES[name]
+            if section in ENTITY_COLUMNS: # heatmaps, gaps stay empty cells
+                if section not in sections:
+                    series[section + ".time"], sections[section], series[section + ".entities"] = self.concat_entities(section)
+                series[name] = sections[section][column] / divisor if divisor != 1 else sections[section][column]
+                continue
+            if section not in sections:
+                time, sections[section], ends = self.concat_section(section)
+                breaks[section] = gap_breaks(time, ends, series["restarttime"])
+                series[section + ".time"] = np.insert(time, breaks[section], time[breaks[section] - 1]) # break points repeat the last sample time
+            values = sections[section][column] / divisor if divisor != 1 else sections[section][column]
+            series[name] = np.insert(values, breaks[section], np.nan)
+
+        return series
+
+    # Method for generating the graphs
+                
+    def generate_graphs(self, file_prefix = None,
+                    plot_all = False,
+                    plot_overview = True,
+                    plot_cpu = False,
+                    plot_load = False,
+                    plot_memory = False,
+                    plot_misc = False,
+                    plot_blocks = False, 
+                    plot_devices = False,
+                    save_path = None,
+                    jobs = 1,
+                    full_resolution = False
+    ):              
+        
+        figures = graph_figures(plot_all, plot_overview, plot_cpu, plot_load, plot_memory, plot_misc, plot_blocks, plot_devices)
+
+        if not file_prefix:
+            ks = sorted(self.data.keys()) # sorted keys (graph dates)
+            if not ks:
+                return []
+
+            file_suffix = (ks[0] + "_to_" + ks[-1]) if ks[0] != ks[-1] else ks[0] # generate file prefix (from graphdates)
+            if self.window is not None:
+                file_suffix = self.window.label(ks[0], ks[-1])
+            file_prefix = self.hostname + "__"  
+            save_name = save_path + "/" + file_prefix + file_suffix if save_path != None else file_prefix + file_suffix
+    
+        series = self.graph_series(figure_series(figures))
+
+        if jobs > 1 and len(figures) > 1:
+            return render_parallel(figures, series, self.cpu_num, save_name, jobs, full_resolution)
+
+        return [render_figure(figure, series, self.cpu_num, save_name, full_resolution) for figure in figures]
+
+# plotted series: (section, column, divisor)
+PLOT_SERIES = {
+    "user": ("cpu_captured", "%usr", 1),
+    "nice": ("cpu_captured", "%nice", 1),
+    "system": ("cpu_captured", "%sys", 1),
+    "iowait": ("cpu_captured", "%iowait", 1),
+    "idle": ("cpu_captured", "%idle", 1),
+    "procs": ("procs_captured", "proc/s", 1),
+    "cswch": ("cswch_captured", "cswch/s", 1),
+    "avg1min": ("load_captured", "ldavg-1", 1),
+    "avg5min": ("load_captured", "ldavg-5", 1),
+    "avg15min": ("load_captured", "ldavg-15", 1),
+    "runq": ("load_captured", "runq-sz", 1),
+    "plist": ("load_captured", "plist-sz", 1),
+    "kbmemfree": ("mem_captured", "kbmemfree", 1024 * 1024), # GB
+    "kbmemused": ("mem_captured", "kbmemused", 1024 * 1024),
+    "kbcached": ("mem_captured", "kbcached", 1024 * 1024),
+    "kbswpfree": ("swp_captured", "kbswpfree", 1024 * 1024),
+    "pswpin": ("pswp_captured", "pswpin/s", 1),
+    "pswpout": ("pswp_captured", "pswpout/s", 1),
+    "dentunusd": ("misc_captured", "dentunusd", 1),
+    "file_nr": ("misc_captured", "file-nr", 1),
+    "inode_nr": ("misc_captured", "inode-nr", 1),
+    "tcp_sck": ("sck_captured", "tcpsck", 1),
+    "udp_sck": ("sck_captured", "udpsck", 1),
+    "bread": ("blocks_captured", "bread/s", 1),
+    "bwrtn": ("blocks_captured", "bwrtn/s", 1),
+    "cpus_user": ("cpu_entities", "%usr", 1), # time x entity
+    "cpus_system": ("cpu_entities", "%sys", 1),
+    "cpus_iowait": ("cpu_entities", "%iowait", 1),
+    "disks_util": ("disk_entities", "%util", 1),
+    "disks_await": ("disk_entities", "await", 1),
+    "disks_tps": ("disk_entities", "tps", 1),
+    "nics_rx": ("nic_entities", "rxkB/s", 1024), # MB/s
+    "nics_tx": ("nic_entities", "txkB/s", 1024),
+}
+
+# subplots: lines as (series, label, color (None = style cycle)), cpu_num adds the CPU count to the legend,
+# or a heatmap as (series, label, entity axis label) with fixed color limits (None = data range)
+PANELS = {
+    "cpu": {"lines": (("user", "%user", '#e73571'), ("nice", "%nice", '#f0e3d5'), ("system", "%sys", '#ff9302'),
+                      ("iowait", "%iowait", '#0382aa'), ("idle", "%idle", '#000e17')), "cpu_num": True},
+    "load": {"lines": (("avg1min", "avg1min", '#595b01'), ("avg5min", "avg5min", '#ffe600'), ("avg15min", "avg15min", '#fe7d00')), "cpu_num": True},
+    "runq": {"lines": (("runq", "runq", '#fec842'),)},
+    "plist": {"lines": (("plist", "plist", '#e97a2e'),)},
+    "memory": {"lines": (("kbmemfree", "memfree/GB", '#a42102'), ("kbmemused", "memused/GB", '#da7701'),
+                         ("kbcached", "cacheused/GB", '#fdc700'), ("kbswpfree", "swpfree/GB", '#77dd77'))},
+    "pswp": {"lines": (("pswpin", "pswpin", '#fe7e0f'), ("pswpout", "pswpout", '#8e3ccb'))},
+    "procs": {"lines": (("procs", "proc/s", '#e64313'),)},
+    "cswch": {"lines": (("cswch", "cswch/s", '#9c9d47'),)},
+    "sockets": {"lines": (("tcp_sck", "tcpsck", '#834e71'), ("udp_sck", "udpsck", '#88d5d2'))},
+    "files": {"lines": (("file_nr", "file_nr", None),)},
+    "inodes": {"lines": (("inode_nr", "inode_nr", None), ("dentunusd", "dentunusd", None))},
+    "bread": {"lines": (("bread", "bread/s", '#E95D22'),)},
+    "bwrtn": {"lines": (("bwrtn", "bwrtn/s", '#017890'),)},
+    "cpus_user": {"heatmap": ("cpus_user", "%usr", "CPU"), "limits": (0, 100)},
+    "cpus_system": {"heatmap": ("cpus_system", "%sys", "CPU"), "limits": (0, 100)},
+    "cpus_iowait": {"heatmap": ("cpus_iowait", "%iowait", "CPU"), "limits": (0, 100)},
+    "disks_util": {"heatmap": ("disks_util", "%util", "DEV"), "limits": (0, 100)},
+    "disks_await": {"heatmap": ("disks_await", "await/ms", "DEV"), "limits": None},
+    "disks_tps": {"heatmap": ("disks_tps", "tps", "DEV"), "limits": None},
+    "nics_rx": {"heatmap": ("nics_rx", "rx MB/s", "IFACE"), "limits": None},
+    "nics_tx": {"heatmap": ("nics_tx", "tx MB/s", "IFACE"), "limits": None},
+}
+
+DPI = 100
+
+# one PNG per graph group: panels as (panel, grid position, colspan, legend columns)
+FIGURES = {
+    "cpu": {"suffix": "_CPU", "size": (16.00, 09.00), "grid": (2, 2),
+            "panels": (("cpu", (0, 0), 2, 1), ("procs", (1, 0), 1, 1), ("cswch", (1, 1), 1, 1))},
+    "load": {"suffix": "_load", "size": (16.00, 09.00), "grid": (3, 1),
+             "panels": (("load", (0, 0), 1, 1), ("runq", (1, 0), 1, 1), ("plist", (2, 0), 1, 1))},
+    "memory": {"suffix": "_memory", "size": (16.00, 09.00), "grid": (1, 1),
+               "panels": (("memory", (0, 0), 1, 1),)},
+    "misc": {"suffix": "_misc", "size": (16.00, 09.00), "grid": (2, 2),
+             "panels": (("files", (0, 0), 1, 1), ("inodes", (0, 1), 1, 1), ("sockets", (1, 0), 2, 1))},
+    "blocks": {"suffix": "_blocks", "size": (16.00, 09.00), "grid": (2, 1),
+               "panels": (("bread", (0, 0), 1, 1), ("bwrtn", (1, 0), 1, 1))},
+    "cpus": {"suffix": "_CPUs", "size": (16.00, 09.00), "grid": (3, 1),
+             "panels": (("cpus_user", (0, 0), 1, 1), ("cpus_system", (1, 0), 1, 1), ("cpus_iowait", (2, 0), 1, 1))},
+    "disks": {"suffix": "_disks", "size": (16.00, 09.00), "grid": (3, 1),
+              "panels": (("disks_util", (0, 0), 1, 1), ("disks_await", (1, 0), 1, 1), ("disks_tps", (2, 0), 1, 1))},
+    "nics": {"suffix": "_nics", "size": (16.00, 09.00), "grid": (2, 1),
+             "panels": (("nics_rx", (0, 0), 1, 1), ("nics_tx", (1, 0), 1, 1))},
+    "overview": {"suffix": "_overview", "size": (19.20, 10.80), "grid": (3, 4),
+                 "panels": (("cpu", (0, 0), 2, 3), ("load", (0, 2), 2, 2), ("memory", (1, 0), 2, 3), ("pswp", (1, 2), 1, 1),
+                            ("procs", (1, 3), 1, 1), ("cswch", (2, 0), 1, 1), ("runq", (2, 1), 1, 1), ("plist", (2, 2), 1, 1),
+                            ("sockets", (2, 3), 1, 1))},
+}
+
+STATS = ("min", "max", "mean", "p50", "p95", "p99", "peak")
+
+def metric_stats(times, values): # [{stat: value}] of every row of a (metric x time) array, all metrics at once
+
+    minima, maxima, means = np.nanmin(values, axis = 1), np.nanmax(values, axis = 1), np.nanmean(values, axis = 1)
+    p50, p95, p99 = np.nanpercentile(values, (50, 95, 99), axis = 1)
+    peaks = times[np.argmax(np.where(np.isnan(values), -np.inf, values), axis = 1)].astype("datetime64[s]")
+
+    return [dict(zip(STATS, (float(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]), str(row[6]).replace("T", " "))))
+            for row in zip(minima, maxima, means, p50, p95, p99, peaks)]
+
+def print_stats(analyzers, as_json = False): # SARAnalyzer.summary of every host as tables, or as one JSON document
+
+    if as_json:
+        json.dump(dict((s.hostname, s.summary()) for s in analyzers), sys.stdout, indent = 2)
+        print()
+        return
+
+    for s in analyzers:
+        for period, metrics in s.summary().items():
+            print("%s  %s" % (s.hostname, period))
+            print("%-12s" % "metric" + "".join("%14s" % stat for stat in STATS[:-1]) + "  " + STATS[-1])
+            for metric, stats in metrics.items():
+                print("%-12s" % metric + "".join("%14.2f" % stats[stat] for stat in STATS[:-1]) + "  " + stats["peak"])
+            print()
+
+def graph_figures(plot_all = False, plot_overview = True, plot_cpu = False, plot_load = False,
+                  plot_memory = False, plot_misc = False, plot_blocks = False, plot_devices = False): # FIGURES the graph flags ask for, in drawing order
+
+    if plot_all == True:
+        plot_overview = True
+        plot_cpu = True
+        plot_load = True
+        plot_memory = True
+        plot_misc = True
+        plot_blocks = True
+
+    default = [plot_all, plot_overview, plot_cpu, plot_load, plot_memory, plot_misc, plot_blocks, plot_devices] # complicated as was not able to find default for 'docopt'
+
+    if not any(default):
+        plot_overview = True
+
+    # per device heatmaps need the big per-CPU / per-device tables parsed, so they are never part of -a
+    return [figure for figure, plot in (("cpu", plot_cpu), ("load", plot_load), ("memory", plot_memory),
+                                        ("misc", plot_misc), ("blocks", plot_blocks), ("cpus", plot_devices), ("disks", plot_devices),
+                                        ("nics", plot_devices), ("overview", plot_overview)) if plot]
+
+def figure_sections(figures): # {section: columns} the given figures draw from, what get_data has to capture for them
+
+    used = {}
+    for name in figure_series(figures):
+        section, column, divisor = PLOT_SERIES[name]
+        used.setdefault(section, set()).add(column)
+
+    return dict((section, tuple(column for column in columns if column in used[section]))
+                for section, columns in list(SECTION_COLUMNS.items()) + list(ENTITY_COLUMNS.items()) if section in used)
+
+def figure_series(figures): # names of the PLOT_SERIES the given figures draw
+
+    return sorted(set(name for figure in figures for panel, position, colspan, ncol in FIGURES[figure]["panels"]
+                      for name in ([PANELS[panel]["heatmap"][0]] if "heatmap" in PANELS[panel] else
+                                   [name for name, label, color in PANELS[panel]["lines"]])))
+
+GAP_FACTOR = 1.5 # samples further apart than this many sampling intervals are not joined by a line
+
+def gap_breaks(time, ends, restarttime): # positions a NaN break point goes in front of: day ends, restarts and sampling gaps
+
+    seconds = time.view(np.int64)
+    if len(seconds) < 2:
+        return np.zeros(0, dtype = np.intp)
+
+    steps = np.diff(seconds)
+    positive = steps[steps > 0]
+    interval = np.median(positive) if len(positive) else 0 # sampling interval
+
+    breaks = np.concatenate([ends[:-1],
+                             np.searchsorted(seconds, restarttime.view(np.int64)),
+                             np.flatnonzero(steps > GAP_FACTOR * interval) + 1 if interval else []]).astype(np.intp)
+
+    breaks = np.unique(breaks)
+
+    return breaks[(breaks > 0) & (breaks < len(seconds))]
+
+def decimate(time, values, buckets): # min/max of every one of `buckets` time buckets, NaN break points and spikes are kept
+
+    if len(values) <= 4 * buckets:
+        return time, values
+
+    seconds = time.view(np.int64)
+    start, span = seconds[0], max(seconds[-1] - seconds[0], 1)
+    bucket = (seconds - start) * buckets // (span + 1)
+
+    # groups of consecutive samples in one bucket, a break point is a group of its own
+    breaks = np.isnan(values)
+    starts = np.flatnonzero(np.concatenate(([True], (bucket[1:] != bucket[:-1]) | breaks[1:] | breaks[:-1])))
+    counts = np.diff(np.append(starts, len(values)))
+    group = np.repeat(np.arange(len(starts)), counts)
+
+    kept = [np.flatnonzero(breaks)]
+    for reduce in (np.fmin, np.fmax):
+        extreme = np.repeat(reduce.reduceat(values, starts), counts)
+        hits = np.flatnonzero(values == extreme)
+        kept.append(hits[np.unique(group[hits], return_index = True)[1]]) # first hit of every group
+
+    kept = np.unique(np.concatenate(kept))
+
+    return time[kept], values[kept]
+
+def heatmap_grid(time, values, buckets): # (bucket x entity) maxima of the time x entity values in equal time buckets, NaN where no sample falls
+
+    seconds = time.view(np.int64)
+    start, span = seconds[0], max(seconds[-1] - seconds[0], 1)
+
+    # never finer than the sampling interval, or every sample would be a stripe between empty buckets
+    steps = np.diff(seconds)
+    positive = steps[steps > 0]
+    if len(positive):
+        buckets = max(min(buckets, int(span // np.median(positive)) + 1), 1)
+
+    bucket = (seconds - start) * buckets // (span + 1)
+
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1]))) # time is sorted, buckets are runs
+    grid = np.full((buckets, values.shape[1]), np.nan, dtype = values.dtype)
+    grid[bucket[starts]] = np.fmax.reduceat(values, starts, axis = 0) # saturation of a short burst stays visible
+
+    return grid
+
+class PanelArtists: # one subplot of a pooled figure: the lines kept from file to file, and what is drawn anew for every file
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.lines = [] # Line2D of every PANELS line (and the CPU count entry), created on the first draw
+        self.transient = [] # restart markers, heatmap image, colorbar and text
+
+    def reset(self): # removes what the last file drew, the kept lines lose their data
+
+        for artist in reversed(self.transient): # the colorbar goes before its image
+            artist.remove()
+        self.transient = []
+        if self.ax.legend_ is not None:
+            self.ax.legend_.remove()
+        self.ax.set_axis_on()
+        for line in self.lines:
+            line.set_data([], [])
+        self.ax.dataLim.set_points(mpl.transforms.Bbox.null().get_points()) # removed images keep their extent in the data limits, shared x axes would stretch to it
+        self.ax.ignore_existing_data_limits = True
+
+    def restart_markers(self, restarttime): # one LineCollection for all restarts, full height whatever the y range
+
+        self.transient.append(self.ax.vlines(restarttime, 0, 1, transform=self.ax.get_xaxis_transform(),
+                                             linestyles="dashed", colors='r', label='RESTART', zorder=5))
+
+def draw_heatmap(artists, panel, series, buckets = None): # draws one heatmap PANELS entry into a pooled subplot, returns its legend (None without restarts)
+
+    ax = artists.ax
+    name, label, axis_label = panel["heatmap"]
+    section = PLOT_SERIES[name][0]
+    time, values, entities = series[section + ".time"], series[name], series[section + ".entities"]
+
+    if not len(time) or not len(entities):
+        artists.transient.append(ax.text(0.5, 0.5, "No %s data" % axis_label, ha = "center", va = "center", transform = ax.transAxes))
+        ax.set_axis_off() # no made up time or entity axis
+        return None
+
+    grid = heatmap_grid(time, values, buckets or len(time))
+    start, end = mpl.dates.date2num(time[[0, -1]])
+    vmin, vmax = panel["limits"] or (None, None)
+    image = ax.imshow(grid.T, aspect = "auto", interpolation = "nearest", origin = "lower",
+                      extent = (start, max(end, start + 1 / 86400), -0.5, len(entities) - 0.5), vmin = vmin, vmax = vmax)
+    artists.transient.extend((image, ax.figure.colorbar(image, ax = ax, label = label, pad = 0.01)))
+    ax.grid(False)
+
+    step = -(-len(entities) // 32) # at most 32 entity labels
+    ax.set_yticks(range(0, len(entities), step), entities[::step])
+    ax.set_ylabel(axis_label)
+
+    lgd = None
+    restarttime = series["restarttime"]
+    if len(restarttime) > 0:
+        artists.restart_markers(restarttime)
+        lgd = ax.legend(loc='best')
+        lgd.get_frame().set_alpha(0)
+
+    return lgd
+
+def draw_panel(artists, panel, series, cpu_num, ncol, buckets = None): # draws one PANELS entry into a pooled subplot, returns its legend
+
+    if "heatmap" in panel:
+        return draw_heatmap(artists, panel, series, buckets)
+
+    ax = artists.ax
+    restarttime = series["restarttime"]
+
+    if not artists.lines: # first use of the subplot, colors of the style cycle go in PANELS order
+        artists.lines = [ax.plot([], [], label=label, color=color)[0] for name, label, color in panel["lines"]]
+        if panel.get("cpu_num"):
+            artists.lines.extend(ax.plot([], [], color='black', marker='+', markeredgewidth=3, markersize=3))
+
+    for line, (name, label, color) in zip(artists.lines, panel["lines"]):
+        time, values = series[PLOT_SERIES[name][0] + ".time"], series[name]
+        if buckets:
+            time, values = decimate(time, values, buckets)
+        line.set_data(time, values)
+
+    if panel.get("cpu_num"):
+        artists.lines[-1].set_label(cpu_num)
+
+    if len(restarttime) > 0:
+        artists.restart_markers(restarttime)
+
+    lgd = ax.legend(ncol=ncol, loc='best')
+    lgd.get_frame().set_alpha(0)
+
+    ax.relim()
+    ax.autoscale(True)
+    ymin, ymax = ax.get_ylim()
+    ydiff = (ymax - ymin)* 0.05
+    ymin -= ydiff
+    ymax += ydiff
+    ax.set_ylim(ymin, ymax)
+
+    return lgd
+
+STYLE_FILE = '/usr/share/asap-graph/mystyle.mplstyle'
+
+FIGURE_POOL = {} # FIGURES name: (Figure, [PanelArtists]) laid out once per process, only the data changes from file to file
+
+def use_matplotlib(): # imports matplotlib on first use, stats mode never does
+
+    global mpl, Figure, FigureCanvasAgg
+    import matplotlib as mpl
+    mpl.use("Agg") # PNGs only, no backend probing
+    import matplotlib.dates
+    import matplotlib.style
+    import matplotlib.transforms
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+def pooled_figure(figure): # the Figure and subplots of a FIGURES entry, created on first use
+
+    if figure not in FIGURE_POOL:
+        if not FIGURE_POOL:
+            use_matplotlib()
+            mpl.style.use(STYLE_FILE) # read once, rcParams hold it for every figure created after
+
+        layout = FIGURES[figure]
+        fig = Figure(figsize = layout["size"], dpi = DPI)
+        FigureCanvasAgg(fig)
+        grid = fig.add_gridspec(*layout["grid"])
+        panels = []
+        for panel, (row, col), colspan, ncol in layout["panels"]:
+            # all panels of a figure show the same time range, one shared locator and formatter places the ticks
+            ax = fig.add_subplot(grid[row, col:col + colspan], sharex = panels[0].ax if panels else None)
+            ax.tick_params(axis = "x", labelrotation = 30)
+            panels.append(PanelArtists(ax))
+
+        time_axis = panels[0].ax
+        time_axis.xaxis_date() # the date locator and converter of all panels, set_data doesn't set axis units like plot does
+        time_axis.xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+        FIGURE_POOL[figure] = (fig, panels)
+
+    return FIGURE_POOL[figure]
+
+def render_figure(figure, series, cpu_num, save_name, full_resolution = False): # draws and saves one FIGURES entry, returns the file name
+
+    layout = FIGURES[figure]
+    fig, panels = pooled_figure(figure)
+
+    try:
+        for (panel, position, colspan, ncol), artists in zip(layout["panels"], panels):
+            buckets = None if full_resolution else int(layout["size"][0] * DPI * colspan / layout["grid"][1]) # panel width in pixels
+            lgd = draw_panel(artists, PANELS[panel], series, cpu_num, ncol, buckets)
+
+        # tight_layout starts from where the axes are, from the defaults again the result doesn't depend on the last file
+        fig.subplots_adjust(**dict((side, mpl.rcParams["figure.subplot." + side]) for side in ("left", "right", "bottom", "top", "wspace", "hspace")))
+        fig.tight_layout()
+        fig.savefig((save_name + layout["suffix"] + ".png"), bbox_extra_artists=(lgd,) if lgd is not None else None, dpi = DPI)
+
+        return save_name + layout["suffix"] + ".png"
+
+    finally:
+        for artists in panels: # nothing keeps the series (or a shared memory block) alive
+            artists.reset()
+
+def share_arrays(arrays): # copies arrays into one new SharedMemory block, returns (block, {name: (dtype, shape, offset)})
+
+    layout = {}
+    size = 0
+    for name, array in arrays.items():
+        size += -size % 64 # cache line aligned
+        layout[name] = (array.dtype.str, array.shape, size)
+        size += array.nbytes
+
+    block = shared_memory.SharedMemory(create = True, size = max(size, 1))
+    for name, array in arrays.items():
+        dtype, shape, offset = layout[name]
+        np.ndarray(shape, dtype = dtype, buffer = block.buf, offset = offset)[...] = array
+
+    return block, layout
+
+def render_shared_figure(job): # renders one figure from arrays in shared memory (render_parallel worker)
+
+    figure, block_name, layout, cpu_num, save_name, full_resolution = job
+
+    block = shared_memory.SharedMemory(name = block_name)
+    try:
+        series = dict((name, np.ndarray(shape, dtype = dtype, buffer = block.buf, offset = offset))
+                      for name, (dtype, shape, offset) in layout.items())
+        return render_figure(figure, series, cpu_num, save_name, full_resolution)
+    finally:
+        series = None # render_figure dropped what the pooled figure pointed into the block
+        block.close()
+
+def render_parallel(figures, series, cpu_num, save_name, jobs, full_resolution = False): # renders figures in worker processes, series go through shared memory, returns the file names
+
+    block, layout = share_arrays(series)
+    try:
+        with multiprocessing.Pool(min(jobs, len(figures))) as pool:
+            return pool.map(render_shared_figure, [(figure, block.name, layout, cpu_num, save_name, full_resolution) for figure in figures], chunksize = 1)
+    finally:
+        block.close()
+        block.unlink()
+
+def worker_memory_limit(jobs, megabytes = None): # address space limit in bytes of one of `jobs` workers
+
+    if megabytes:
+        return int(megabytes) * 1024 * 1024
+
+    ram = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+    return max(ram // jobs, 1024 * 1024 * 1024)
+
+def limit_worker_memory(limit): # Pool initializer
+
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+RENDER_VERSION = 2 # bump whenever plotting changes what ends up in the PNGs, older manifests don't match then
+
+def graph_manifest(sarfiles, analyzer_options, graph_options): # what the graphs of a group of files depend on: input fingerprints, options, style and versions
+
+    try:
+        with open(STYLE_FILE, "rb") as style:
+            style_hash = hashlib.sha1(style.read()).hexdigest()
+    except OSError:
+        style_hash = None
+
+    inputs = {}
+    for sarfile in sorted(sarfiles):
+        try:
+            inputs[sarfile] = list(file_fingerprint(archive_member(sarfile)[0]))
+        except OSError:
+            inputs[sarfile] = None
+
+    window = analyzer_options.get("window")
+    options = dict((name, value) for name, value in graph_options.items() if name != "save_path")
+    options.update(legacy_parser = analyzer_options.get("legacy_parser", False),
+                   window = None if window is None else [window.start, window.end])
+
+    return {"inputs": inputs, "options": options, "style": style_hash, "version": [PARSER_VERSION, RENDER_VERSION]}
+
+def manifest_file(sarfiles, save_path): # manifest of a group of files, next to the PNGs
+
+    key = hashlib.sha1("\0".join(sorted(os.path.abspath(sarfile) for sarfile in sarfiles)).encode()).hexdigest()[:16]
+
+    return os.path.join(save_path or ".", ".asap-graph-%s.json" % key)
+
+def manifest_unchanged(manifest, path, save_path): # whether the manifest at path matches and all the PNGs it lists are still there
+
+    try:
+        with open(path) as recorded_file:
+            recorded = json.load(recorded_file)
+    except (OSError, ValueError):
+        return False
+
+    outputs = recorded.pop("outputs", None)
+
+    return recorded == manifest and outputs is not None and all(os.path.exists(os.path.join(save_path or ".", output)) for output in outputs)
+
+def write_manifest(path, manifest):
+
+    try:
+        with tempfile.NamedTemporaryFile("w", dir = os.path.dirname(path), suffix = ".tmp", delete = False) as temp:
+            json.dump(manifest, temp)
+        os.replace(temp.name, path)
+    except OSError: # read-only save path just means plotting again next time
+        pass
+
+def parse_by_host(sarfiles, analyzer_options): # one SARAnalyzer per host with the data of all its files, archives may hold several hosts
+
+    sources = {} # file or archive: the member paths to read from it (None = all)
+    for sarfile in sarfiles:
+        archive, member = archive_member(sarfile)
+        if member is None:
+            sources[sarfile] = None
+        else:
+            sources.setdefault(archive, set()).add(member)
+
+    analyzers = {}
+    for sarfile, members in sources.items():
+        for name, stream in sar_sources(sarfile, members):
+            s = SARAnalyzer(**analyzer_options)
+            s.get_data(name, stream)
+            if s.data:
+                analyzers.setdefault(s.hostname, s).data.update(s.data)
+
+    return list(analyzers.values())
+
+def plot_group(sarfiles, analyzer_options, graph_options, force = False): # parses one group_sarfiles group and plots it as one timeline per host, unless nothing changed since the last run
 
-            file_suffix = (ks[0] + "_to_" + ks[-1]) if ks[0] != ks[-1] else ks[0] # generate file prefix (from graphdates)
-            file_prefix = self.hostname + "__"  
-            save_name = save_path + "/" + file_prefix + file_suffix if save_path != None else file_prefix + file_suffix
-    
-        # variables init as extend used later
-        
-        restarttime = []
-        
-        cputime = []
-        user = []
-        nice = []
-        system = []
-        iowait = []
-        idle = []      
-        
-        procstime = []
-        cswchtime = []
-        procs = []
-        cswch = []     
-        
-        loadtime = []
-        runq = []
-        plist = []
-        avg1min = []
-        avg5min = []
-        avg15min = []      
-        
-        memtime = []
-        kbmemfree = []
-        kbmemused = []
-        kbcached = []
-        kbswpfree = []     
-        
-        pswptime = []
-        pswpin = []
-        pswpout = []
-        
-        scktime = []
-        misctime = []
-        dentunusd = []
-        file_nr = []
-        inode_nr = []
-        tcp_sck = []
-        udp_sck = []
-        
-        blockstime = []
-        bread = []
-        bwrtn = []
-        
-        # for non-data masking
-        
-        masked_cputime = []
-        masked_procstime = []
-        masked_cswchtime = []
-        masked_loadtime = []
-        masked_memtime = []
-        masked_pswptime = []
-        masked_scktime = []
-        masked_misctime = []
-        masked_blockstime = []
-        
-        for graphdate, data_struct in sorted(self.data.items(), key = lambda x: x[0]):
-                       
-            cpu_captured = data_struct["cpu_captured"]
-            procs_captured = data_struct["procs_captured"]
-            cswch_captured = data_struct["cswch_captured"]
-            load_captured = data_struct["load_captured"]
-            mem_captured = data_struct["mem_captured"]
-            swp_captured = data_struct["swp_captured"]
-            pswp_captured = data_struct["pswp_captured"]
-            misc_captured = data_struct["misc_captured"]
-            sck_captured = data_struct["sck_captured"]
-            blocks_captured = data_struct["blocks_captured"]
-            
-            restarts = data_struct["restarts"]
-            
-            get_time_func = lambda x: datetime.datetime.strptime(graphdate+" "+x[0], "%y-%m-%d %H:%M:%S")
+    manifest = graph_manifest(sarfiles, analyzer_options, graph_options)
+    path = manifest_file(sarfiles, graph_options.get("save_path"))
+    if not force and manifest_unchanged(manifest, path, graph_options.get("save_path")):
+        print('Skipping "%s", unchanged since the last run.' % (os.path.dirname(sarfiles[0]) if len(sarfiles) > 1 else sarfiles[0]))
+        return
 
-            restarttime.extend(list(map(lambda x: get_time_func((x,)), restarts)))
+    outputs = []
+    for s in parse_by_host(sarfiles, analyzer_options):
+        outputs.extend(s.generate_graphs(**graph_options))
 
-            cputime.extend(list(map(get_time_func, cpu_captured)))
-            masked_cputime.append(len(cputime))  
-            
-            if self.rhel_version == 5:                
-                user.extend(list(map(lambda x: float(x[self.indeces.get('%user')]), cpu_captured)))         
-            else:                
-                user.extend(list(map(lambda x: float(x[self.indeces.get('%usr')]), cpu_captured)))
-            
-            nice.extend(list(map(lambda x: float(x[self.indeces.get("%nice")]), cpu_captured)))
-            
-            if self.rhel_version == 5:                
-                system.extend(list(map(lambda x: float(x[self.indeces.get("%system")]), cpu_captured)))            
-            else:               
-                system.extend(list(map(lambda x: float(x[self.indeces.get("%sys")]), cpu_captured)))
-            
-            iowait.extend(list(map(lambda x: float(x[self.indeces.get("%iowait")]), cpu_captured)))
-            idle.extend(list(map(lambda x: float(x[self.indeces.get("%idle")]), cpu_captured)))
-            
-            procstime.extend(list(map(get_time_func, procs_captured)))
-            cswchtime.extend(list(map(get_time_func, cswch_captured)))
-            masked_procstime.append(len(procstime))
-            masked_cswchtime.append(len(cswchtime))
-            procs.extend(list(map(lambda x: float(x[self.indeces.get('proc/s')]), procs_captured)))
-            cswch.extend(list(map(lambda x: float(x[self.indeces.get('cswch/s')]), cswch_captured)))
-            
-            loadtime.extend(list(map(get_time_func, load_captured)))
-            masked_loadtime.append(len(loadtime))
-            runq.extend(list(map(lambda x: float(x[self.indeces.get('runq-sz')]), load_captured)))
-            plist.extend(list(map(lambda x: float(x[self.indeces.get('plist-sz')]), load_captured)))
-            avg1min.extend(list(map(lambda x: float(x[self.indeces.get('ldavg-1')]), load_captured)))
-            avg5min.extend(list(map(lambda x: float(x[self.indeces.get('ldavg-5')]), load_captured)))
-            avg15min.extend(list(map(lambda x: float(x[self.indeces.get('ldavg-15')]), load_captured)))
-            
-            memtime.extend(list(map(get_time_func, mem_captured)))
-            masked_memtime.append(len(memtime))
-            kbmemfree.extend(list(map(lambda x: float(x[self.indeces.get('kbmemfree')]) / 1024 / 1024, mem_captured)))
-            kbmemused.extend(list(map(lambda x: float(x[self.indeces.get('kbmemused')]) / 1024 / 1024, mem_captured)))
-            kbcached.extend(list(map(lambda x: float(x[self.indeces.get('kbcached')]) / 1024 / 1024, mem_captured)))
-            
-            if self.rhel_version == 5:                            
-                kbswpfree.extend(list(map(lambda x: float(x[self.indeces.get('kbswpfree')]) / 1024 / 1024, mem_captured)))            
-            else:                
-                kbswpfree.extend(list(map(lambda x: float(x[self.indeces.get('kbswpfree')]) / 1024 / 1024, swp_captured)))    
-            
-            
-            pswptime.extend(list(map(get_time_func, pswp_captured)))
-            masked_pswptime.append(len(pswptime))
-            pswpin.extend(list(map(lambda x: float(x[self.indeces.get('pswpin/s')]), pswp_captured)))
-            pswpout.extend(list(map(lambda x: float(x[self.indeces.get('pswpout/s')]), pswp_captured)))
-            
-            misctime.extend(list(map(get_time_func, misc_captured)))
-            masked_misctime.append(len(misctime))
-            dentunusd.extend(list(map(lambda x: float(x[self.indeces.get('dentunusd')]), misc_captured)))
-            
-            if self.rhel_version == 5:            
-                file_nr.extend(list(map(lambda x: float(x[self.indeces.get('file-sz')]), misc_captured)))
-                inode_nr.extend(list(map(lambda x: float(x[self.indeces.get('inode-sz')]), misc_captured)))
-            
-            else:                
-                file_nr.extend(list(map(lambda x: float(x[self.indeces.get('file-nr')]), misc_captured)))
-                inode_nr.extend(list(map(lambda x: float(x[self.indeces.get('inode-nr')]), misc_captured)))
-            
-            scktime.extend(list(map(get_time_func, sck_captured)))
-            masked_scktime.append(len(scktime))
-            tcp_sck.extend(list(map(lambda x: float(x[self.indeces.get('tcpsck')]), sck_captured)))
-            udp_sck.extend(list(map(lambda x: float(x[self.indeces.get('udpsck')]), sck_captured)))
-            
-            blockstime.extend(list(map(get_time_func, blocks_captured)))
-            masked_blockstime.append(len(blockstime))  
-            bread.extend(list(map(lambda x: float(x[self.indeces.get('bread/s')]), blocks_captured)))
-            bwrtn.extend(list(map(lambda x: float(x[self.indeces.get('bwrtn/s')]), blocks_captured)))
-            
-            
-            
-        if plot_cpu: # CPU usage graph plot
-                        
-            plt.style.use('/usr/share/asap-graph/mystyle.mplstyle')
-            
-             
-            plt.subplot2grid((2,2), (0, 0), colspan=2)
-            
-            user = ma.MaskedArray(user)
-            nice = ma.MaskedArray(nice)
-            system = ma.MaskedArray(system)
-            iowait = ma.MaskedArray(iowait)
-            idle = ma.MaskedArray(idle)
-            if masked_cputime:
-                for m in masked_cputime[:-1]:
-                    user[m] = ma.masked
-                    nice[m] = ma.masked
-                    system[m] = ma.masked
-                    iowait[m] = ma.masked
-                    idle[m] = ma.masked
-            
-            plt.plot(np.array(cputime), user, label="%user")
-            plt.plot(np.array(cputime), nice, label="%nice")
-            plt.plot(np.array(cputime), system, label="%system")
-            plt.plot(np.array(cputime), iowait, label="%iowait")
-            plt.plot(np.array(cputime), idle, label="%idle")        
-            plt.plot([], [], label=self.cpu_num, color='black', marker='+', markeredgewidth=3, markersize=3)
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+    write_manifest(path, dict(manifest, outputs = [os.path.basename(output) for output in outputs]))
 
-            plt.subplot2grid((2,2), (1, 0))
-            
-            procs = ma.MaskedArray(procs)
-            if masked_procstime:
-                for m in masked_procstime[:-1]:
-                    procs[m] = ma.masked
-            
-            plt.plot(np.array(procstime), procs, label="procs/s", color='c')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)          
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+def process_group(job): # parse and plot one group of files in a worker, returns what it would have printed
 
-            plt.subplot2grid((2,2), (1, 1))
-            
-            cswch = ma.MaskedArray(cswch)
-            if masked_cswchtime:
-                for m in masked_cswchtime[:-1]:
-                    cswch[m] = ma.masked
-            
-            plt.plot(np.array(cputime), cswch, label="cswch/s", color='g')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                      
-            fig = plt.gcf()
-            fig.set_size_inches(16.00, 09.00)
-            
-            plt.tight_layout()
-            plt.savefig((save_name + "_CPU.png"), bbox_extra_artists=(lgd,), dpi = 100)
-            plt.clf()
-                     
-        if plot_load: # load graph plot
+    sarfiles, analyzer_options, graph_options, force = job
 
-            plt.style.use('/usr/share/asap-graph/mystyle.mplstyle')
-            
-            plt.subplot(311)
-            
-            avg1min = ma.MaskedArray(avg1min)
-            avg5min = ma.MaskedArray(avg5min)
-            avg15min = ma.MaskedArray(avg15min)
-            if masked_loadtime:
-                for m in masked_loadtime[:-1]:
-                    avg1min[m] = ma.masked
-                    avg5min[m] = ma.masked
-                    avg15min[m] = ma.masked
+    status = io.StringIO()
+    with contextlib.redirect_stdout(status):
+        try:
+            plot_group(sarfiles, analyzer_options, graph_options, force)
+        except MemoryError:
+            print(Bcolors.FAIL + ("FAIL: %s exceeded the worker memory limit!" % ", ".join(sarfiles)) + Bcolors.ENDC)
 
-            
-            plt.plot(np.array(loadtime), avg1min, label="avg1min", color='#595b01')
-            plt.plot(np.array(loadtime), avg5min, label="avg5min", color='#ffe600')
-            plt.plot(np.array(loadtime), avg15min, label="avg15min", color='#fe7d00')
-            plt.plot([], [], label=self.cpu_num, color='black', marker='+', markeredgewidth=3, markersize=3)
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-            
-            plt.subplot(312)
-            
-            runq = ma.MaskedArray(runq)
-            if masked_loadtime:
-                for m in masked_loadtime[:-1]:
-                    runq[m] = ma.masked
-            
-            plt.plot(np.array(loadtime), runq, label="runq", color='#fec842')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-         
-            plt.subplot(313)
-            
-            plist = ma.MaskedArray(plist)
-            if masked_loadtime:
-                for m in masked_loadtime[:-1]:
-                    plist[m] = ma.masked
+    return status.getvalue()
 
-            
-            plt.plot(np.array(loadtime), plist, label="plist", color='#e97a2e')
-                        
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                      
-            fig = plt.gcf()
-            fig.set_size_inches(16.00, 09.00)
-            
-            plt.tight_layout()
-            plt.savefig((save_name + "_load.png"), bbox_extra_artists=(lgd,), dpi = 100)
-            plt.cla()
-            plt.clf()          
-        
-        if plot_memory: # memory usage graph plot
-        
-            plt.style.use('/usr/share/asap-graph/mystyle.mplstyle')
-           
-            kbmemfree = ma.MaskedArray(kbmemfree)
-            kbmemused = ma.MaskedArray(kbmemused)
-            kbcached = ma.MaskedArray(kbcached)
-            kbswpfree = ma.MaskedArray(kbswpfree)
-            if masked_memtime:
-                for m in masked_memtime[:-1]:
-                    kbmemfree[m] = ma.masked
-                    kbmemused[m] = ma.masked
-                    kbcached[m] = ma.masked
-                    kbswpfree[m] = ma.masked
-       
-            plt.plot(np.array(memtime), kbmemfree, label="memfree/GB")
-            plt.plot(np.array(memtime), kbmemused, label="memused/GB")
-            plt.plot(np.array(memtime), kbcached, label="cacheused/GB")       
-            plt.plot(np.array(memtime), kbswpfree, label="kbswpfree/GB")
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                      
-            fig = plt.gcf()
-            fig.set_size_inches(16.00, 09.00)
-            
-            plt.tight_layout()
-            plt.savefig((save_name + "_memory.png"), bbox_extra_artists=(lgd,), dpi = 100)
-            plt.clf()
-     
-        if plot_misc: # m isc graph plot
+def process_parallel(groups, analyzer_options, graph_options, jobs, memory_limit, force = False): # status lines are printed in groups order
 
-            plt.style.use('/usr/share/asap-graph/mystyle.mplstyle')
-            
-            plt.subplot2grid((2,2), (0, 0))
+    jobs_list = [(sarfiles, analyzer_options, graph_options, force) for sarfiles in groups]
 
-            file_nr = ma.MaskedArray(file_nr)
-            if masked_misctime:
-                for m in masked_misctime[:-1]:
-                    file_nr[m] = ma.masked
+    # fresh workers now and then, so nothing matplotlib keeps around piles up
+    with multiprocessing.Pool(jobs, initializer = limit_worker_memory, initargs = (memory_limit,), maxtasksperchild = 32) as pool:
+        for status in pool.imap(process_group, jobs_list):
+            sys.stdout.write(status)
+            sys.stdout.flush()
 
-            plt.plot(np.array(misctime), file_nr, label="file_nr")
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+PIPELINE_DEPTH = 4 # files read ahead, and files parsed ahead of the merge, in cat mode
+PREFETCH_BLOCK = 1024 * 1024
 
-            plt.subplot2grid((2,2), (0, 1))
+def prefetch(sarfile): # reads a file once so the parser finds it in the page cache
 
-            inode_nr = ma.MaskedArray(inode_nr)
-            dentunusd = ma.MaskedArray(dentunusd)
-            if masked_misctime:
-                for m in masked_misctime[:-1]:
-                    inode_nr[m] = ma.masked
-                    dentunusd[m] = ma.masked
-            
-            plt.plot(np.array(misctime), inode_nr, label="inode_nr")
-            plt.plot(np.array(misctime), dentunusd, label="dentunusd")
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+    buffer = bytearray(PREFETCH_BLOCK)
+    try:
+        with open(sarfile, "rb") as data:
+            while data.readinto(buffer):
+                pass
+    except OSError: # the parser reports it
+        pass
 
-            plt.subplot2grid((2,2), (1, 0), colspan=2)
-                        
-            tcp_sck = ma.MaskedArray(tcp_sck)
-            udp_sck = ma.MaskedArray(udp_sck)
-            if masked_scktime:
-                for m in masked_scktime[:-1]:
-                    tcp_sck[m] = ma.masked
-                    udp_sck[m] = ma.masked
-                        
-            plt.plot(np.array(scktime), tcp_sck, label="tcp_sck", color='c')
-            plt.plot(np.array(scktime), udp_sck, label="udp_sck", color='m')
-            
-   
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                                  
-            fig = plt.gcf()
-            fig.set_size_inches(16.00, 09.00)
-            
-            plt.tight_layout()
-            plt.savefig((save_name + "_misc.png"), bbox_extra_artists=(lgd,), dpi = 100)
-            plt.cla() 
-       
-        if plot_blocks:
-       
-            plt.style.use('/usr/share/asap-graph/mystyle.mplstyle')
-            
-            plt.subplot(211)
-            
-            bread = ma.MaskedArray(bread)
-            if masked_blockstime:
-                for m in masked_loadtime[:-1]:
-                    bread[m] = ma.masked
-            
-            plt.plot(np.array(loadtime), bread, label="bread/s", color='#E95D22')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+def parse_sarfile(job): # parses one file in a pipeline worker, returns (what it would have printed, SARAnalyzer)
 
-            plt.subplot(212)
-            
-            bwrtn = ma.MaskedArray(bwrtn)
-            if masked_loadtime:
-                for m in masked_loadtime[:-1]:
-                    bwrtn[m] = ma.masked
-            
-            plt.plot(np.array(loadtime), bwrtn, label="bwrtn/s", color='#017890')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-       
-            fig = plt.gcf()
-            fig.set_size_inches(16.00, 09.00)
-            
-            plt.tight_layout()
-            plt.savefig((save_name + "_blocks.png"), bbox_extra_artists=(lgd,), dpi = 100)
-            plt.cla() 
-       
-        if plot_overview: # all in one graph plot
-        
-            plt.style.use('/usr/share/asap-graph/mystyle.mplstyle')         
-            
-                # CPU
-            
-            plt.subplot2grid((3,4), (0,0), colspan=2)
-            
-            user = ma.MaskedArray(user)
-            nice = ma.MaskedArray(nice)
-            system = ma.MaskedArray(system)
-            iowait = ma.MaskedArray(iowait)
-            idle = ma.MaskedArray(idle)
-            if masked_cputime:
-                for m in masked_cputime[:-1]:
-                    user[m] = ma.masked
-                    nice[m] = ma.masked
-                    system[m] = ma.masked
-                    iowait[m] = ma.masked
-                    idle[m] = ma.masked
-                      
-            plt.plot(np.array(cputime), user, label="%user", color='#e73571') 
-            plt.plot(np.array(cputime), nice, label="%nice", color='#f0e3d5')
-            plt.plot(np.array(cputime), system, label="%sys", color='#ff9302')
-            plt.plot(np.array(cputime), iowait, label="%iowait", color='#0382aa')
-            plt.plot(np.array(cputime), idle, label="%idle", color='#000e17')
-            plt.plot([], [], label=self.cpu_num, color='black', marker='+', markeredgewidth=3, markersize=3)
-            
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=3, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-            
-                # LOAD
-            
-            plt.subplot2grid((3,4), (0, 2), colspan=2)
-            
-            avg1min = ma.MaskedArray(avg1min)
-            avg5min = ma.MaskedArray(avg5min)
-            avg15min = ma.MaskedArray(avg15min)
-            if masked_loadtime:
-                for m in masked_loadtime[:-1]:
-                    avg1min[m] = ma.masked
-                    avg5min[m] = ma.masked
-                    avg15min[m] = ma.masked
-                    
-            plt.plot(np.array(loadtime), avg1min, label="avg1min", color='#595b01')
-            plt.plot(np.array(loadtime), avg5min, label="avg5min", color='#ffe600')
-            plt.plot(np.array(loadtime), avg15min, label="avg15min", color='#fe7d00')
-            plt.plot([], [], label=self.cpu_num, color='black', marker='+', markeredgewidth=3, markersize=3)
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=2, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+    sarfile, analyzer_options = job
 
-                # MEMORY
-                
-            plt.subplot2grid((3,4), (1, 0), colspan=2)  
-            
-            kbmemfree = ma.MaskedArray(kbmemfree)
-            kbmemused = ma.MaskedArray(kbmemused)
-            kbcached = ma.MaskedArray(kbcached)
-            kbswpfree = ma.MaskedArray(kbswpfree)
-            if masked_memtime:
-                for m in masked_memtime[:-1]:
-                    kbmemfree[m] = ma.masked
-                    kbmemused[m] = ma.masked
-                    kbcached[m] = ma.masked
-                    kbswpfree[m] = ma.masked
-            
-            plt.plot(np.array(memtime), kbmemfree, label="memfree/GB", color='#a42102')
-            plt.plot(np.array(memtime), kbmemused, label="memused/GB", color='#da7701')
-            plt.plot(np.array(memtime), kbcached, label="cacheused/GB", color='#fdc700')       
-            plt.plot(np.array(memtime), kbswpfree, label="swpfree/GB", color='#77dd77')
-            
-            if len(restarttime) > 0:             
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=3, loc='best')
-            lgd.get_frame().set_alpha(0)          
+    status = io.StringIO()
+    with contextlib.redirect_stdout(status):
+        s = SARAnalyzer(**analyzer_options)
+        s.get_data(sarfile)
 
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
+    return status.getvalue(), s
 
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                
-                # PSWP
+def parse_pipeline(sarfiles, analyzer_options, jobs, depth = PIPELINE_DEPTH): # yields parse_sarfile results in sarfiles order, reading, parsing and merging overlap
 
-            plt.subplot2grid((3,4), (1, 2))
-            
-            pswpin = ma.MaskedArray(pswpin)
-            pswpout = ma.MaskedArray(pswpout)
-            if masked_pswptime:
-                for m in masked_pswptime[:-1]:
-                    pswpin[m] = ma.masked
-                    pswpout[m] = ma.masked
+    # reader thread -> bounded queue -> `jobs` parser processes -> at most `depth` results waiting for the caller
+    prefetched = queue.Queue(depth)
 
-            
-            plt.plot(np.array(pswptime), pswpin, label="pswpin", color='#fe7e0f')
-            plt.plot(np.array(pswptime), pswpout, label="pswpout", color='#8e3ccb')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not  i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            ymin, ymax = plt.ylim()
-
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-            
-                # PROC/S
-            
-            plt.subplot2grid((3,4), (1, 3))
-            
-            procs = ma.MaskedArray(procs)
-            if masked_procstime:
-                for m in masked_procstime[:-1]:
-                    procs[m] = ma.masked
-            
-            plt.plot(np.array(procstime), procs, label="proc/s", color='#e64313')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-            
-                # CSWCH
-            
-            plt.subplot2grid((3,4), (2, 0))
-            
-            cswch = ma.MaskedArray(cswch)
-            if masked_cswchtime:
-                for m in masked_cswchtime[:-1]:
-                    cswch[m] = ma.masked
-            
-            plt.plot(np.array(cswchtime), cswch, label="cswch/s", color='#9c9d47')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                                    
-               # RUNQ        
-                         
-            plt.subplot2grid((3,4), (2, 1))
-            
-            runq = ma.MaskedArray(runq)
-            if masked_cswchtime:
-                for m in masked_loadtime[:-1]:
-                    runq[m] = ma.masked
-            
-            plt.plot(np.array(loadtime), runq, label="runq", color='#fec842')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-                 
-                 # PLIST
-            
-            plt.subplot2grid((3,4), (2, 2))
-            
-            plist = ma.MaskedArray(plist)
-            if masked_cswchtime:
-                for m in masked_loadtime[:-1]:
-                    plist[m] = ma.masked
-            
-            plt.plot(np.array(loadtime), plist, label="plist", color='#e97a2e')
-                        
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
-            
-                # SOCKETS
-            
-            plt.subplot2grid((3,4), (2, 3))
-            
-            tcp_sck = ma.MaskedArray(tcp_sck)
-            udp_sck = ma.MaskedArray(udp_sck)
-            if masked_scktime:
-                for m in masked_scktime[:-1]:
-                    tcp_sck[m] = ma.masked
-                    udp_sck[m] = ma.masked
-            
-            plt.plot(np.array(scktime), tcp_sck, label="tcpsck", color='#834e71')
-            plt.plot(np.array(scktime), udp_sck, label="udpsck", color='#88d5d2')
-            
-            if len(restarttime) > 0:
-                [plt.axvline(_x, linestyle="dashed", color='r', label='RESTART' if not i else None, zorder=5) for i, _x in enumerate(restarttime)]
-            
-            lgd = plt.legend(ncol=1, loc='best')
-            lgd.get_frame().set_alpha(0)
-            
-            ymin, ymax = plt.ylim()
-            ydiff = (ymax - ymin)* 0.05
-            ymin -= ydiff
-            ymax += ydiff
-            plt.ylim(ymin, ymax)
-            
-            plt.xticks(rotation=30)
-            plt.gca().xaxis.set_major_formatter(mpl.dates.DateFormatter('%m-%d %H:%M'))
+    def read_ahead():
+        for sarfile in sarfiles:
+            prefetch(sarfile)
+            prefetched.put(sarfile)
+        prefetched.put(None)
 
+    with multiprocessing.Pool(jobs) as pool: # forked before the reader thread runs, children can't inherit its locks held
+        threading.Thread(target = read_ahead, daemon = True).start()
+        pending = collections.deque()
+        sarfile = prefetched.get()
+        while sarfile is not None or pending:
+            if pending and (sarfile is None or len(pending) >= depth or pending[0].ready()):
+                yield pending.popleft().get()
+            else:
+                pending.append(pool.apply_async(parse_sarfile, ((sarfile, analyzer_options),)))
+                sarfile = prefetched.get()
 
-            fig = plt.gcf()
-            fig.set_size_inches(19.20, 10.80)
-            plt.tight_layout()
-            plt.savefig((save_name + "_overview.png"), bbox_extra_artists=(lgd,), dpi = 100)
-            plt.cla()
-                        
 if __name__ == "__main__":
         
     try:
 
+        from docopt import docopt
         arguments = docopt(__doc__)
 
+        if not arguments['-j'].isdigit() or int(arguments['-j']) < 1:
+            print(Bcolors.FAIL + ('The number of jobs "%s" is not a number of at least 1!' % arguments['-j']) + Bcolors.ENDC)
+            exit(1)
+        jobs = int(arguments['-j'])
+
+        if arguments['--worker-memory'] != None and (not arguments['--worker-memory'].isdigit() or int(arguments['--worker-memory']) < 1):
+            print(Bcolors.FAIL + ('The worker memory "%s" is not a number of MB!' % arguments['--worker-memory']) + Bcolors.ENDC)
+            exit(1)
+
+        cache = None if arguments['--no-cache'] else ParseCache(rebuild = arguments['--rebuild-cache'])
+
+        window = None
+        if arguments['--from'] != None or arguments['--to'] != None:
+            try:
+                window = TimeWindow.from_arguments(arguments['--from'], arguments['--to'])
+            except ValueError as e:
+                print(Bcolors.FAIL + ("Invalid --from/--to: %s" % e) + Bcolors.ENDC)
+                exit(1)
+
+        # only the sar sections the requested graphs draw are captured
+        sections = figure_sections(graph_figures(plot_all = arguments['-a'], plot_overview = arguments['-o'], plot_cpu = arguments['-c'],
+                                                 plot_load = arguments['-l'], plot_memory = arguments['-m'], plot_misc = arguments['-s'],
+                                                 plot_blocks = arguments['-b'], plot_devices = arguments['-d']))
+
         if (arguments['file']) == True:
             
             if arguments['-p'] != None and not os.path.exists(arguments['-p']):
@@ -1223,11 +2772,13 @@ if __name__ == "__main__":
                                         
             for sarfile in arguments['FILE']:
                 
-                s = SARAnalyzer()
-                s.get_data(sarfile)
-                s.generate_graphs(plot_all = arguments['-a'], plot_overview = arguments['-o'], plot_cpu = arguments['-c'], 
-                                  plot_load = arguments['-l'], plot_memory = arguments['-m'], plot_misc = arguments['-s'], 
-                                  plot_blocks = arguments['-b'], save_path = arguments['-p'])
+                for name, stream in sar_sources(sarfile):
+                    s = SARAnalyzer(legacy_parser = arguments['--legacy-parser'], cache = cache, window = window, sections = sections)
+                    s.get_data(name, stream)
+                    s.generate_graphs(plot_all = arguments['-a'], plot_overview = arguments['-o'], plot_cpu = arguments['-c'], 
+                                      plot_load = arguments['-l'], plot_memory = arguments['-m'], plot_misc = arguments['-s'], 
+                                      plot_blocks = arguments['-b'], plot_devices = arguments['-d'], save_path = arguments['-p'], jobs = jobs,
+                                      full_resolution = arguments['--full-resolution'])
               
         if (arguments['xp']) == True:
               
@@ -1241,22 +2792,46 @@ if __name__ == "__main__":
                 print(Bcolors.FAIL + ('The path "%s" is not valid or does not exist!' % "".join(arguments['-x'])) + Bcolors.ENDC)
                 exit(1)
               
-            s = SARAnalyzer()
+            max_depth = None
+            if arguments['--max-depth'] != None:
+                if not arguments['--max-depth'].isdigit():
+                    print(Bcolors.FAIL + ('The depth "%s" is not a number!' % arguments['--max-depth']) + Bcolors.ENDC)
+                    exit(1)
+                max_depth = int(arguments['--max-depth'])
+
+            s = SARAnalyzer(legacy_parser = arguments['--legacy-parser'], cache = cache, window = window, sections = sections)
             
             if arguments['-x'] != None:
-                sarfiles = s.get_sars_recursively(arguments['-x'])                 
+                sarfiles = s.get_sars_recursively(arguments['-x'], max_depth)                 
             
             else:
-                sarfiles = s.get_sars_recursively()
+                sarfiles = s.get_sars_recursively(max_depth = max_depth)
             
-            for sarfile in sarfiles:
-                s = SARAnalyzer() 
-                s.get_data(sarfile)             
-                s.generate_graphs(plot_all = arguments['-a'], plot_overview = arguments['-o'], plot_cpu = arguments['-c'], 
-                              plot_load = arguments['-l'], plot_memory = arguments['-m'], plot_misc = arguments['-s'], 
-                              plot_blocks = arguments['-b'], save_path = arguments['-p'])
+            # one concatenated timeline per directory and host, like cat mode
+            groups = group_sarfiles(sarfiles)
+
+            analyzer_options = dict(legacy_parser = arguments['--legacy-parser'], cache = cache, window = window, sections = sections)
+            graph_options = dict(plot_all = arguments['-a'], plot_overview = arguments['-o'], plot_cpu = arguments['-c'],
+                                 plot_load = arguments['-l'], plot_memory = arguments['-m'], plot_misc = arguments['-s'],
+                                 plot_blocks = arguments['-b'], plot_devices = arguments['-d'], save_path = arguments['-p'],
+                                 full_resolution = arguments['--full-resolution'])
+
+            if jobs > 1:
+                process_parallel(groups, analyzer_options, graph_options, jobs, worker_memory_limit(jobs, arguments['--worker-memory']), arguments['--force'])
+
+            else:
+                for sarfiles in groups:
+                    plot_group(sarfiles, analyzer_options, graph_options, arguments['--force'])
                               
                              
+        if (arguments['stats']) == True:
+
+            # status lines go to stderr, stdout is the tables / JSON only
+            with contextlib.redirect_stdout(sys.stderr):
+                analyzers = parse_by_host(arguments['FILE'], dict(legacy_parser = arguments['--legacy-parser'], cache = cache, window = window))
+
+            print_stats(analyzers, arguments['--json'])
+
         if (arguments['cat']) == True:
             
             if arguments['-p'] != None and not os.path.exists(arguments['-p']):
@@ -1264,16 +2839,21 @@ if __name__ == "__main__":
                 print(Bcolors.FAIL + ('The path "%s" is not valid or does not exist!' % str(arguments['-p'])) + Bcolors.ENDC)
                 exit(1)
             
-            s = SARAnalyzer()
-            sarfiles = complete_concat_sars(arguments['FILE'])
+            s = SARAnalyzer(legacy_parser = arguments['--legacy-parser'], cache = cache, window = window, sections = sections)
+            sarfiles = complete_concat_sars(arguments['FILE'], window)
 
-            for sarfile in sarfiles:
+            analyzer_options = dict(legacy_parser = arguments['--legacy-parser'], cache = cache, window = window, sections = sections)
+            for status, parsed in parse_pipeline(sarfiles, analyzer_options, jobs):
 
-                s.get_data(sarfile)
+                sys.stdout.write(status)
+                if parsed.hostname:
+                    s.hostname, s.cpu_num = parsed.hostname, parsed.cpu_num
+                s.data.update(parsed.data)
 
             s.generate_graphs(plot_all = arguments['-a'], plot_overview = arguments['-o'], plot_cpu = arguments['-c'], 
                               plot_load = arguments['-l'], plot_memory = arguments['-m'], plot_misc = arguments['-s'], 
-                              plot_blocks = arguments['-b'], save_path = arguments['-p'])
+                              plot_blocks = arguments['-b'], plot_devices = arguments['-d'], save_path = arguments['-p'], jobs = jobs,
+                                  full_resolution = arguments['--full-resolution'])
     except IsADirectoryError:
         print(Bcolors.FAIL + "Path provided, expected file!" + Bcolors.ENDC)
         exit(1)                                                                                                    
@@ -7,7 +7,7 @@ License:	MIT
 URL:            https://github.com/Rezney/asap-graph		
 Source0:	asap-graph-1.0.4.tar.gz
 
-Requires:	python3-docopt python3-matplotlib	
+Requires:	python3 >= 3.8 python3-docopt python3-matplotlib python3-numpy	
 
 %description
 
@@ -0,0 +1,15 @@
+import importlib.util
+import os
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "asap-graph.py")
+
+@pytest.fixture(scope = "session")
+def asap_graph(): # the script loaded as a module, its name has a dash
+
+    spec = importlib.util.spec_from_file_location("asap_graph", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
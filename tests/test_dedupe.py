@@ -0,0 +1,55 @@
+import gzip
+import os
+import tarfile
+
+def sar_day(host, month, day, rows = 3): # a small sar text day, unique per host and date
+
+    lines = ["Linux 4.18.0-80.el8.x86_64 (%s) \t%02d/%02d/2026 \t_x86_64_\t(4 CPU)" % (host, month, day), "",
+             "00:00:01        CPU     %usr     %nice      %sys   %iowait    %steal      %irq     %soft    %guest    %gnice     %idle"]
+    lines += ["00:%02d:01        all      %d.00      0.00      1.00      0.00      0.00      0.00      0.00      0.00      0.00     90.00" % (10 * row, day)
+              for row in range(1, rows + 1)]
+
+    return "\n".join(lines) + "\n"
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, "w") as sarfile:
+        sarfile.write(text)
+
+def test_header_days_are_graphdates(asap_graph):
+
+    assert asap_graph.text_header("Linux 3.10.0 (hostA) \t10/03/2026 \t_x86_64_\t(4 CPU)") == ("hostA", "26-10-03")
+    assert asap_graph.normalize_graphdate("2026-10-03") == asap_graph.normalize_graphdate("10/03/26") == "26-10-03"
+
+def test_identical_copies_stay_in_the_largest_timeline(asap_graph, tmp_path):
+
+    for day in (1, 2, 3, 4):
+        write(str(tmp_path / ("sos1/var/log/sa/sar%02d" % day)), sar_day("hostA", 10, day))
+    for day in (3, 4, 5):
+        write(str(tmp_path / ("ext/var/log/sa/sar%02d" % day)), sar_day("hostA", 10, day))
+
+    kept = asap_graph.dedupe_sarfiles(str(path) for path in sorted(tmp_path.rglob("sar*")))
+
+    assert [os.path.relpath(path, str(tmp_path)) for path in kept] == ["ext/var/log/sa/sar05"] + ["sos1/var/log/sa/sar%02d" % day for day in (1, 2, 3, 4)]
+
+def test_archive_members_and_compressed_copies(asap_graph, tmp_path):
+
+    write(str(tmp_path / "stage/var/log/sa/sar05"), sar_day("hostA", 10, 5))
+    write(str(tmp_path / "stage/var/log/sa/sar06"), sar_day("hostA", 10, 6))
+    with tarfile.open(str(tmp_path / "sos.tar.xz"), "w:xz") as archive:
+        archive.add(str(tmp_path / "stage/var"), "var")
+    write(str(tmp_path / "a/sar05"), sar_day("hostA", 10, 5))
+    with gzip.open(str(tmp_path / "a/sar06.gz"), "wt") as compressed:
+        compressed.write(sar_day("hostA", 10, 6))
+
+    kept = asap_graph.dedupe_sarfiles([str(tmp_path / "sos.tar.xz"), str(tmp_path / "a/sar05"), str(tmp_path / "a/sar06.gz")])
+
+    assert kept == [str(tmp_path / "a/sar05"), str(tmp_path / "a/sar06.gz")]
+
+def test_differing_copies_keep_the_newest(asap_graph, tmp_path):
+
+    write(str(tmp_path / "a/sar07"), sar_day("hostA", 10, 7, rows = 2))
+    write(str(tmp_path / "b/sar07"), sar_day("hostA", 10, 7, rows = 5))
+    os.utime(str(tmp_path / "a/sar07"), (0, 0))
+
+    assert asap_graph.dedupe_sarfiles([str(tmp_path / "a/sar07"), str(tmp_path / "b/sar07")]) == [str(tmp_path / "b/sar07")]
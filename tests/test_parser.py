@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+# section headers of sar -A per RHEL release (sysstat 7.0, 9.0, 10.1, 11.7), with a separate cswch/s table on RHEL5
+HEADERS = {
+    "2.6.18-398.el5": [
+        ["CPU", "%user", "%nice", "%system", "%iowait", "%steal", "%idle"],
+        ["proc/s"],
+        ["cswch/s"],
+        ["pswpin/s", "pswpout/s"],
+        ["tps", "rtps", "wtps", "bread/s", "bwrtn/s"],
+        ["kbmemfree", "kbmemused", "%memused", "kbbuffers", "kbcached", "kbswpfree", "kbswpused", "%swpused", "kbswpcad"],
+        ["dentunusd", "file-sz", "inode-sz", "super-sz", "%super-sz", "dquot-sz", "%dquot-sz", "rtsig-sz", "%rtsig-sz"],
+        ["totsck", "tcpsck", "udpsck", "rawsck", "ip-frag"],
+        ["runq-sz", "plist-sz", "ldavg-1", "ldavg-5", "ldavg-15"],
+    ],
+    "2.6.32-754.el6.x86_64": [
+        ["CPU", "%usr", "%nice", "%sys", "%iowait", "%steal", "%irq", "%soft", "%guest", "%idle"],
+        ["proc/s", "cswch/s"],
+        ["pswpin/s", "pswpout/s"],
+        ["tps", "rtps", "wtps", "bread/s", "bwrtn/s"],
+        ["kbmemfree", "kbmemused", "%memused", "kbbuffers", "kbcached", "kbcommit", "%commit"],
+        ["kbswpfree", "kbswpused", "%swpused", "kbswpcad", "%swpcad"],
+        ["dentunusd", "file-nr", "inode-nr", "pty-nr"],
+        ["totsck", "tcpsck", "udpsck", "rawsck", "ip-frag", "tcp-tw"],
+        ["runq-sz", "plist-sz", "ldavg-1", "ldavg-5", "ldavg-15"],
+    ],
+    "3.10.0-1160.el7.x86_64": [
+        ["CPU", "%usr", "%nice", "%sys", "%iowait", "%steal", "%irq", "%soft", "%guest", "%gnice", "%idle"],
+        ["proc/s", "cswch/s"],
+        ["pswpin/s", "pswpout/s"],
+        ["tps", "rtps", "wtps", "bread/s", "bwrtn/s"],
+        ["kbmemfree", "kbmemused", "%memused", "kbbuffers", "kbcached", "kbcommit", "%commit", "kbactive", "kbinact", "kbdirty"],
+        ["kbswpfree", "kbswpused", "%swpused", "kbswpcad", "%swpcad"],
+        ["dentunusd", "file-nr", "inode-nr", "pty-nr"],
+        ["runq-sz", "plist-sz", "ldavg-1", "ldavg-5", "ldavg-15", "blocked"],
+        ["totsck", "tcpsck", "udpsck", "rawsck", "ip-frag", "tcp-tw"],
+    ],
+    "4.18.0-553.el8_10.x86_64": [
+        ["CPU", "%usr", "%nice", "%sys", "%iowait", "%steal", "%irq", "%soft", "%guest", "%gnice", "%idle"],
+        ["proc/s", "cswch/s"],
+        ["pswpin/s", "pswpout/s"],
+        ["tps", "rtps", "wtps", "dtps", "bread/s", "bwrtn/s", "bdscd/s"],
+        ["kbmemfree", "kbavail", "kbmemused", "%memused", "kbbuffers", "kbcached", "kbcommit", "%commit", "kbactive", "kbinact", "kbdirty"],
+        ["kbswpfree", "kbswpused", "%swpused", "kbswpcad", "%swpcad"],
+        ["dentunusd", "file-nr", "inode-nr", "pty-nr"],
+        ["runq-sz", "plist-sz", "ldavg-1", "ldavg-5", "ldavg-15", "blocked"],
+        ["totsck", "tcpsck", "udpsck", "rawsck", "ip-frag", "tcp-tw"],
+    ],
+}
+
+def sar_text(kernel, am_pm = False, comma = False, rows = 6): # sar -A of one day: every section of HEADERS[kernel], 10 minutes apart
+
+    def clock(minutes):
+        hour, minute = divmod(minutes, 60)
+        if am_pm:
+            return "%02d:%02d:01 %s" % ((hour - 1) % 12 + 1, minute, "PM" if hour >= 12 else "AM")
+        return "%02d:%02d:01" % (hour, minute)
+
+    def number(row, column):
+        value = "%d.%02d" % (row * 7 + column, (row * 13 + column * 29) % 100)
+        return value.replace(".", ",") if comma else value
+
+    # AM/PM samples run past midnight, through 12 AM, into the next day
+    minutes = [(1410 + 10 * row) % 1440 for row in range(rows)] if am_pm else [10 * row for row in range(rows)]
+
+    lines = ["Linux %s (testhost) \t10/01/2026 \t_x86_64_\t(2 CPU)" % kernel, ""]
+    for header in HEADERS[kernel]:
+        lines.append("%s  %s" % (clock(minutes[0]), "  ".join(header)))
+        entities = ["all", "0", "1"] if header[0] == "CPU" else [None]
+        for row, start in enumerate(minutes):
+            for entity in entities:
+                values = [number(row, column) for column in range(len(header) - (entity is not None))]
+                lines.append("  ".join([clock(start)] + ([entity] if entity else []) + values))
+        average = [number(0, column) for column in range(len(header) - (header[0] == "CPU"))]
+        lines.append("  ".join(["Average:"] + (["all"] if header[0] == "CPU" else []) + average))
+        lines.append("")
+
+    return "\n".join(lines) + "\n"
+
+SAMPLES = [(kernel, False, False) for kernel in HEADERS] + [
+    ("2.6.18-398.el5", True, False),
+    ("4.18.0-553.el8_10.x86_64", True, False),
+    ("3.10.0-1160.el7.x86_64", False, True),
+    ("4.18.0-553.el8_10.x86_64", True, True),
+]
+
+@pytest.mark.parametrize("kernel, am_pm, comma", SAMPLES)
+def test_table_parser_matches_legacy(asap_graph, tmp_path, kernel, am_pm, comma): # every captured section, timestamp and value the same
+
+    sarfile = str(tmp_path / "sar01")
+    with open(sarfile, "w") as text:
+        text.write(sar_text(kernel, am_pm, comma))
+
+    parsed, legacy = asap_graph.SARAnalyzer(), asap_graph.SARAnalyzer(legacy_parser = True)
+    parsed.get_data(sarfile)
+    legacy.get_data(sarfile)
+
+    assert (parsed.hostname, parsed.cpu_num, parsed.rhel_version) == (legacy.hostname, legacy.cpu_num, legacy.rhel_version)
+    assert list(parsed.data) == list(legacy.data) == ["26-10-01"]
+
+    sections, expected = parsed.data["26-10-01"], legacy.data["26-10-01"]
+    for name, columns in asap_graph.SECTION_COLUMNS.items():
+        assert len(expected[name].times) == 6, name
+        assert list(sections[name].times) == list(expected[name].times), name
+        for column in columns:
+            assert np.array_equal(sections[name][column], expected[name][column]), (name, column)
+    assert list(sections["restarts"]) == list(expected["restarts"])
+
+def test_restart_inside_a_section(asap_graph, tmp_path): # sar repeats it in every section, the legacy parser fails on it
+
+    lines = sar_text("3.10.0-1160.el7.x86_64").split("\n")
+    for num in reversed([num for num, line in enumerate(lines) if line.startswith("00:20:01")]):
+        lines.insert(num, "00:15:01       LINUX RESTART")
+    sarfile = str(tmp_path / "sar01")
+    with open(sarfile, "w") as text:
+        text.write("\n".join(lines))
+
+    parsed = asap_graph.SARAnalyzer()
+    parsed.get_data(sarfile)
+
+    sections = parsed.data["26-10-01"]
+    assert list(sections["restarts"]) == [asap_graph.day_start("26-10-01") + 15 * 60 + 1]
+    assert all(len(sections[name].times) == 6 for name in asap_graph.SECTION_COLUMNS)
+
+def test_parse_clocks(asap_graph):
+
+    clocks = ["00:00:01", "23:59:59", "12:00:00AM", "12:30:00AM", "12:00:00PM", "01:05:07PM", "11:59:59PM", "1:02:03", "7:08:09PM"]
+
+    seconds = asap_graph.parse_clocks(clocks)
+
+    assert list(seconds) == [1, 86399, 0, 1800, 43200, 47107, 86399, 3723, 68889]
+    assert list(seconds) == [asap_graph.clock_seconds(clock) for clock in clocks] # the bulk path agrees with the one clock one
+    assert len(asap_graph.parse_clocks([])) == 0
+
+def test_unroll_midnight(asap_graph):
+
+    unroll = lambda seconds: list(asap_graph.unroll_midnight(np.array(seconds)))
+
+    assert unroll([82800, 86340, 60, 7200]) == [82800, 86340, 86460, 93600]
+    assert unroll([86000, 100, 86000, 100]) == [86000, 86500, 172400, 172900] # a file of more than two days
+    assert unroll([7200, 3600, 7200]) == [7200, 3600, 7200] # clocks set back an hour (DST) are no wrap
+    assert unroll([]) == []
@@ -0,0 +1,119 @@
+import os
+import shutil
+import struct
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+# sadc lives outside of PATH on most distributions
+SADC = shutil.which("sadc") or next((path for path in ("/usr/lib64/sa/sadc", "/usr/lib/sa/sadc", "/usr/lib/sysstat/sadc")
+                                     if os.access(path, os.X_OK)), None)
+
+needs_sysstat = pytest.mark.skipif(SADC is None or shutil.which("sar") is None, reason = "needs sysstat (sadc and sar)")
+
+@pytest.fixture(scope = "module")
+def sa_file(tmp_path_factory): # a saNN file sadc writes on this machine, next to the sarNN text sar makes of it, as sa2 does
+
+    path = tmp_path_factory.mktemp("sa")
+    safile, sarfile = str(path / "sa01"), str(path / "sar01")
+    subprocess.run([SADC, "-S", "ALL", "1", "6", safile], check = True)
+    with open(sarfile, "w") as text:
+        subprocess.run(["sar", "-A", "-t", "-f", safile], check = True, stdout = text, env = dict(os.environ, LC_ALL = "C"))
+
+    return safile, sarfile
+
+@needs_sysstat
+def test_binary_matches_sar(asap_graph, sa_file): # every column the binary reader decodes, against what sar prints for the same file
+
+    safile, sarfile = sa_file
+    binary, text = asap_graph.SARAnalyzer(), asap_graph.SARAnalyzer()
+    binary.get_data(safile)
+    text.get_data(sarfile)
+
+    assert binary.hostname == text.hostname
+    assert list(binary.data) == list(text.data)
+
+    for graphdate, sections in text.data.items():
+        for name, columns in asap_graph.SECTION_COLUMNS.items():
+            expected, decoded = sections[name], binary.data[graphdate][name]
+            assert list(decoded.times) == list(expected.times), name
+            for column in columns:
+                # sar prints two decimals
+                assert np.allclose(decoded[column], expected[column], atol = 0.01, equal_nan = True), (name, column)
+
+def write_sa(path, fmt = 0x2175): # a synthetic saNN file of host myhost, 2026-10-03, with counters growing by known steps every 60 s
+
+    v12 = fmt == 0x2175
+    fields = lambda types: "<" + "Q" * (types[0] + types[1]) + "I" * types[2]
+    header_types, act_types = (1, 1, 12 if v12 else 11), (0, 0, 9 if v12 else 8)
+    rec_types = (2, 0, 1) if v12 else (2, 1, 0)
+    header_fmt, act_fmt, rec_fmt = fields(header_types) + "BBb65s65s65s65s", fields(act_types), fields(rec_types) + "4B"
+    rec_size = (struct.calcsize(rec_fmt) + 7) // 8 * 8
+
+    # id, field types, items: CPU (all + 2 CPUs), PCSW, MEMORY
+    acts = [(1, (10, 0, 0), 3), (2, (1, 1, 0), 1), (7, (0, 17, 0), 1)]
+    step = {1: [600, 60, 300, 4800, 180, 0, 60, 0, 0, 0], 2: [6000, 60]}
+    memory = [1000000, 100000, 2000000, 8000000, 500000] + [0] * 7 + [400000] + [0] * 4
+
+    data = struct.pack("<HH4BI3Ii48x", 0xd596, fmt, 12, 0, 0, 0, struct.calcsize(header_fmt), *header_types, 0)
+    uints = [3, len(acts), 126, *act_types, *rec_types, struct.calcsize(act_fmt), rec_size] + ([0] if v12 else [])
+    data += struct.pack(header_fmt, 0, 100, *uints, 3, 9, 8, b"Linux", b"myhost", b"5.14.0", b"x86_64")
+    for act, types, items in acts:
+        data += struct.pack(act_fmt, act, 0, items, 1, *([1] if v12 else []), struct.calcsize(fields(types)), *types)
+
+    for minute in range(5):
+        uptime = (minute + 1) * 6000
+        data += struct.pack(rec_fmt, *((uptime, 0, 0) if v12 else (uptime, uptime, 0)), 1, 0, minute, 0).ljust(rec_size, b"\0")
+        for act, types, items in acts:
+            data += struct.pack("<i", items) if v12 else b""
+            values = memory if act == 7 else [minute * value for value in step[act]]
+            data += struct.pack(fields(types), *values) * items
+
+    with open(path, "wb") as sa:
+        sa.write(data)
+
+@pytest.mark.parametrize("fmt", [0x2173, 0x2175])
+def test_synthetic_file(asap_graph, tmp_path, fmt): # both self-describing formats, against values computed by hand
+
+    path = str(tmp_path / "sa03")
+    write_sa(path, fmt)
+    sar = asap_graph.SARAnalyzer()
+    sar.get_data(path)
+
+    assert sar.hostname == "myhost"
+    sections = sar.data["26-10-03"]
+    cpu, memory = sections["cpu_captured"], sections["mem_captured"]
+    assert len(cpu.times) == 4 # the first record is the base of the deltas
+    for column, value in {"%usr": 10, "%nice": 1, "%sys": 5, "%iowait": 3, "%idle": 80}.items():
+        assert np.allclose(cpu[column], value), column
+    assert np.allclose(sections["cswch_captured"]["cswch/s"], 100) and np.allclose(sections["procs_captured"]["proc/s"], 1)
+    assert len(sections["load_captured"].times) == 0 # no queue activity in the file
+    # sysstat 12 leaves buffers, cache and slab out of the used memory
+    assert np.allclose(memory["kbmemused"], 4500000 if fmt == 0x2175 else 7000000)
+    assert np.allclose(memory["kbmemfree"], 1000000) and np.allclose(memory["kbcached"], 2000000)
+
+def test_old_format_through_sadf(asap_graph, tmp_path, monkeypatch, capsys): # formats before 0x2173 go through sadf -c when it's there
+
+    converted, old = str(tmp_path / "converted"), str(tmp_path / "sa03")
+    write_sa(converted)
+    with open(converted, "rb") as sa:
+        data = bytearray(sa.read())
+    struct.pack_into("<H", data, 2, 0x2171) # the format of sysstat 10 (RHEL7)
+    with open(old, "wb") as sa:
+        sa.write(data)
+
+    sar = asap_graph.SARAnalyzer()
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    sar.get_data(old)
+    assert "unsupported sysstat file format 0x2171" in capsys.readouterr().out and not sar.data
+
+    # a sadf that writes the converted file, as sadf -c does
+    sadf = tmp_path / "bin" / "sadf"
+    sadf.parent.mkdir()
+    sadf.write_text("#!%s\nimport sys\nassert sys.argv[1] == '-c'\nsys.stdout.buffer.write(open(%r, 'rb').read())\n" % (sys.executable, converted))
+    sadf.chmod(0o755)
+    monkeypatch.setenv("PATH", str(sadf.parent))
+    sar.get_data(old)
+    assert list(sar.data) == ["26-10-03"] and np.allclose(sar.data["26-10-03"]["cpu_captured"]["%idle"], 80)
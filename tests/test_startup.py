@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPT
+
+SAR_TEXT = """Linux 4.18.0-80.el8.x86_64 (testhost) \t10/01/2026 \t_x86_64_\t(4 CPU)
+
+00:00:01        CPU     %usr     %nice      %sys   %iowait    %steal      %irq     %soft    %guest    %gnice     %idle
+00:10:01        all      1.00      0.00      1.00      0.00      0.00      0.00      0.00      0.00      0.00     98.00
+00:20:01        all      3.00      0.00      1.00      0.00      0.00      0.00      0.00      0.00      0.00     96.00
+Average:        all      2.00      0.00      1.00      0.00      0.00      0.00      0.00      0.00      0.00     97.00
+"""
+
+def imported(*arguments, cwd = None): # (exit code, stdout, names of the modules the script imported) of a run with -X importtime
+
+    run = subprocess.run([sys.executable, "-X", "importtime", SCRIPT] + list(arguments), cwd = cwd, stdout = subprocess.PIPE, stderr = subprocess.PIPE,
+                         universal_newlines = True, env = dict(os.environ, XDG_CACHE_HOME = cwd or os.getcwd()))
+    modules = set(line.split("|")[-1].strip() for line in run.stderr.splitlines() if line.startswith("import time:"))
+
+    return run.returncode, run.stdout, modules
+
+def loaded(modules, package):
+    return any(module == package or module.startswith(package + ".") for module in modules)
+
+def test_help_imports_no_numpy():
+
+    code, output, modules = imported("--help")
+
+    assert code == 0 and "Usage:" in output
+    assert not loaded(modules, "numpy") and not loaded(modules, "matplotlib") and not loaded(modules, "multiprocessing")
+
+def test_argument_errors_import_no_numpy(tmp_path):
+
+    code, output, modules = imported("file", "-p", str(tmp_path / "missing"), "sar01")
+
+    assert code == 1 and "is not valid or does not exist" in output
+    assert not loaded(modules, "numpy") and not loaded(modules, "matplotlib")
+
+@pytest.mark.parametrize("arguments, message", [
+    (("file", "-j", "x", "sar01"), 'The number of jobs "x"'),
+    (("cat", "-j", "0", "sar01", "sar02"), 'The number of jobs "0"'),
+    (("xp", "-j", "2", "--worker-memory", "lots"), 'The worker memory "lots"'),
+])
+def test_bad_numbers_fail_cleanly(tmp_path, arguments, message): # reported before anything is parsed, like --max-depth
+
+    code, output, modules = imported(*arguments, cwd = str(tmp_path))
+
+    assert code == 1 and message in output
+    assert not loaded(modules, "numpy")
+
+def test_stats_imports_no_matplotlib(tmp_path):
+
+    (tmp_path / "sar01").write_text(SAR_TEXT)
+    code, output, modules = imported("stats", "--no-cache", "--json", "sar01", cwd = str(tmp_path))
+
+    assert code == 0 and json.loads(output)["testhost"]
+    assert loaded(modules, "numpy") and not loaded(modules, "matplotlib")
+
+def test_lazy_module_replaces_itself(asap_graph): # later lookups of the global find the module, not the stand-in
+
+    asap_graph.lazy_test = asap_graph.LazyModule("lazy_test", "json")
+    try:
+        assert asap_graph.lazy_test.dumps is json.dumps
+        assert asap_graph.lazy_test is json
+    finally:
+        del asap_graph.lazy_test
@@ -0,0 +1,51 @@
+import calendar
+import datetime
+
+import numpy as np
+import pytest
+
+def epoch(*fields):
+    return calendar.timegm(datetime.datetime(*fields).timetuple())
+
+def test_absolute_bounds_and_spans(asap_graph):
+
+    TimeWindow = asap_graph.TimeWindow
+    now = epoch(2026, 10, 3, 12, 0)
+
+    window = TimeWindow.from_arguments("2026-10-02 12:00", "2026-10-03T06:30:15")
+    assert (window.start, window.end) == (epoch(2026, 10, 2, 12, 0), epoch(2026, 10, 3, 6, 30, 15))
+
+    # a span is relative to the other bound when that one is absolute, to now otherwise
+    assert TimeWindow.from_arguments("2026-10-02", "+90m").end == epoch(2026, 10, 2, 1, 30)
+    assert TimeWindow.from_arguments("-2h", None, now = now).start == epoch(2026, 10, 3, 10, 0)
+
+    with pytest.raises(ValueError):
+        TimeWindow.from_arguments("2026-10-03", "2026-10-02")
+    with pytest.raises(ValueError):
+        TimeWindow.from_arguments("yesterday", None)
+
+def test_mask_and_overlaps(asap_graph):
+
+    window = asap_graph.TimeWindow(epoch(2026, 10, 2, 12, 0), epoch(2026, 10, 2, 13, 0))
+    times = np.array([epoch(2026, 10, 2, 11, 59), epoch(2026, 10, 2, 12, 0), epoch(2026, 10, 2, 13, 0), epoch(2026, 10, 2, 13, 1)])
+
+    assert list(window.mask(times)) == [False, True, True, False]
+    assert window.overlaps(epoch(2026, 10, 2), epoch(2026, 10, 3))
+    assert not window.overlaps(epoch(2026, 10, 3), epoch(2026, 10, 4))
+    assert window.covers_day(2) and not window.covers_day(3)
+
+def test_clocks_past_midnight(asap_graph): # a section running past midnight keeps counting up
+
+    window = asap_graph.TimeWindow(epoch(2026, 10, 2, 23, 0), epoch(2026, 10, 3, 0, 30))
+    window.day(epoch(2026, 10, 2))
+
+    assert [window.contains(clock) for clock in ("22:50:01", "23:50:01", "00:10:01", "00:40:01")] == [False, True, True, False]
+
+def test_label_per_day_set(asap_graph): # files of other days in one window get names of their own
+
+    window = asap_graph.TimeWindow.from_arguments("2026-10-02 12:00", "2026-10-03 12:00")
+
+    assert window.label("26-10-02", "26-10-02") == "26-10-02_1200_to_26-10-02_2359"
+    assert window.label("26-10-03", "26-10-03") == "26-10-03_0000_to_26-10-03_1200"
+    assert window.label("26-10-02", "26-10-03") == "26-10-02_1200_to_26-10-03_1200"
+    assert asap_graph.TimeWindow.from_arguments("2026-10-01", None).label("26-10-02", "26-10-04") == "26-10-02_0000_to_26-10-04_2359"